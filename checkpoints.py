@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Incremental-statistics checkpoints for append-only input files.
+
+A checkpoint stores the mergeable StatsAccumulator state for one (input
+file, function, mode) together with the byte offset it covers: moments
+and sketches as JSON, raw values for exact quantiles as a float64 file.
+The next run only parses the bytes after that offset and merges them in.
+
+A checkpoint is discarded when the file has shrunk, when the bytes just
+before the offset no longer match (the file was rewritten rather than
+appended to), or when REDUCER_VERSION has changed.
+
+The JSON file is the commit point. It names the values file and how many
+values of it belong to the checkpoint. A save appends only the values added
+since the last one and then replaces the JSON, so a crash in between leaves
+the previous checkpoint intact.
+"""
+import os
+import json
+import hashlib
+from array import array
+from typing import Optional, Tuple
+from stats_core import StatsAccumulator, REDUCER_VERSION
+
+CHECKPOINT_DIR = os.path.join('.cache', 'checkpoints')
+# Bytes before the covered offset that must be unchanged for the checkpoint to be valid
+FINGERPRINT_BYTES = 4096
+# Layout of the checkpoint JSON; checkpoints in another layout are ignored
+CHECKPOINT_FORMAT = 2
+
+def _fingerprint(source: str, offset: int) -> str:
+    with open(source, 'rb') as f:
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+def checkpoint_base(source: str, func: str, approx: bool) -> str:
+    path = os.path.abspath(source)
+    path_hash = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+    mode = 'approx' if approx else 'exact'
+    return os.path.join(CHECKPOINT_DIR, f"{os.path.basename(path)}-{path_hash}-{func}-{mode}")
+
+def _read_checkpoint(base: str) -> Optional[dict]:
+    try:
+        with open(f"{base}.json", 'r') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return checkpoint if checkpoint.get('format') == CHECKPOINT_FORMAT else None
+
+def _is_current(checkpoint: dict, source: str) -> bool:
+    """Whether the checkpoint still describes a prefix of the source"""
+    offset = checkpoint['offset']
+    return (checkpoint['reducer_version'] == REDUCER_VERSION
+            and os.path.getsize(source) >= offset
+            and _fingerprint(source, offset) == checkpoint['fingerprint'])
+
+def load_checkpoint(source: str, func: str, approx: bool) -> Tuple[int, Optional[StatsAccumulator]]:
+    """Return (covered byte offset, accumulator), or (0, None) when there is no valid checkpoint"""
+    checkpoint = _read_checkpoint(checkpoint_base(source, func, approx))
+    if checkpoint is None or not _is_current(checkpoint, source):
+        return 0, None
+
+    values = None
+    if checkpoint['values_file']:
+        values = array('d')
+        try:
+            with open(os.path.join(CHECKPOINT_DIR, checkpoint['values_file']), 'rb') as f:
+                values.fromfile(f, checkpoint['values_count'])
+        except (OSError, EOFError):
+            return 0, None
+    return checkpoint['offset'], StatsAccumulator.from_state(checkpoint['state'], values)
+
+def save_checkpoint(source: str, offset: int, accumulator: StatsAccumulator) -> None:
+    """Persist the accumulator as covering source bytes [0, offset)"""
+    base = checkpoint_base(source, accumulator.func, accumulator.approx)
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    previous = _read_checkpoint(base)
+
+    values_file, values_count = None, 0
+    values = accumulator.values
+    if values is not None:
+        itemsize = values.itemsize
+        saved = 0
+        if (previous and previous['values_file'] and _is_current(previous, source)
+                and previous['values_count'] <= len(values)):
+            # The accumulator grew from this checkpoint: only its new values go to disk
+            values_file, saved = previous['values_file'], previous['values_count']
+            path = os.path.join(CHECKPOINT_DIR, values_file)
+            if not os.path.exists(path) or os.path.getsize(path) < saved * itemsize:
+                values_file, saved = None, 0
+        if values_file is None:
+            # A new file; the current checkpoint keeps referencing its own until replaced below
+            values_file = f"{os.path.basename(base)}-{offset}.f64"
+        with open(os.path.join(CHECKPOINT_DIR, values_file), 'r+b' if saved else 'wb') as f:
+            # Drop values that a crashed save appended but never committed
+            f.truncate(saved * itemsize)
+            f.seek(saved * itemsize)
+            f.write(memoryview(values)[saved:])
+        values_count = len(values)
+
+    checkpoint = {
+        'format': CHECKPOINT_FORMAT,
+        'source': os.path.abspath(source),
+        'offset': offset,
+        'fingerprint': _fingerprint(source, offset),
+        'reducer_version': REDUCER_VERSION,
+        'values_file': values_file,
+        'values_count': values_count,
+        'state': accumulator.to_state()
+    }
+    # Replacing the JSON commits the checkpoint: until then it names the old offset and value count
+    with open(f"{base}.json.tmp", 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{base}.json.tmp", f"{base}.json")
+
+    if previous and previous['values_file'] and previous['values_file'] != values_file:
+        try:
+            os.remove(os.path.join(CHECKPOINT_DIR, previous['values_file']))
+        except OSError:
+            pass
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Binary float64 column cache for the kaggleinput text files.
+
+Each text file is parsed once into a raw native-endian float64 file under
+.cache/columns, named after the source path, size and mtime. Later jobs map
+that file into memory and read the values through a memoryview without any
+text parsing or copying. Editing or replacing the source changes its size or
+mtime, which yields a new cache entry; the stale one is removed once no
+job has it mapped.
+"""
+import os
+import sys
+import glob
+import mmap
+import hashlib
+from array import array
+
+CACHE_DIR = os.path.join('.cache', 'columns')
+# Values parsed per write while building a column
+BUILD_BATCH = 1 << 16
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+def _source_prefix(source: str) -> str:
+    path = os.path.abspath(source)
+    return f"{os.path.basename(path)}-{_digest(path)}"
+
+def cache_path(source: str) -> str:
+    """Cache file for the current version (size and mtime) of a source file"""
+    stat = os.stat(source)
+    version = _digest(f"{stat.st_size}:{stat.st_mtime_ns}")
+    return os.path.join(CACHE_DIR, f"{_source_prefix(source)}-{version}.f64")
+
+def build_column(source: str) -> str:
+    """Parse a one-number-per-line text file into a float64 column file"""
+    target = cache_path(source)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    # Drop columns built from older versions of the same source. Another job may
+    # still have one mapped, which Windows refuses to delete; a later build retries.
+    for stale in glob.glob(os.path.join(CACHE_DIR, f"{_source_prefix(source)}-*.f64")):
+        if stale != target:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    tmp = f"{target}.{os.getpid()}.tmp"
+    batch = array('d')
+    with open(source, 'rb') as src, open(tmp, 'wb') as dst:
+        for line in src:
+            if line.strip():
+                batch.append(float(line))
+                if len(batch) >= BUILD_BATCH:
+                    batch.tofile(dst)
+                    batch = array('d')
+        batch.tofile(dst)
+    os.replace(tmp, target)
+    return target
+
+def ensure_column(source: str) -> str:
+    """Return the cache file for a source, building it on first use"""
+    target = cache_path(source)
+    if not os.path.exists(target):
+        target = build_column(source)
+    return target
+
+def open_column(column_file: str) -> memoryview:
+    """Map a column file read-only and return a zero-copy float64 view of it"""
+    if os.path.getsize(column_file) == 0:
+        return memoryview(array('d'))
+    with open(column_file, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # The view keeps the mapping alive; it is unmapped once the view is released
+    return memoryview(mapped).cast('d')
+
+if __name__ == "__main__":
+    for name in sys.argv[1:]:
+        print(f"{name} -> {ensure_column(name)}")
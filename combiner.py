@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# Hadoop streaming combiner for stddev, skewness, kurtosis and minmax jobs.
+# Folds the "val" and "moments" records of one map task into a single
+# "moments" record, so the shuffle carries one line per mapper instead of
+# one line per input row. Not valid for median or percentile jobs.
+# Pass --wire typedbytes when the map output is typedbytes.
+import sys
+import argparse
+from stats_core import Moments, WIRE_FORMATS
+
+parser = argparse.ArgumentParser(description="Hadoop streaming combiner for the moment-based jobs")
+parser.add_argument("--wire", choices=WIRE_FORMATS, default="text",
+                    help="typedbytes: read and write binary records")
+args = parser.parse_args()
+
+moments = Moments()
+
+if args.wire == "typedbytes":
+    # Only typedbytes jobs ship typed_bytes.py to the task nodes
+    from typed_bytes import VALUES_KEY, read_records, unpack_values, write_record
+
+    for key, val in read_records(sys.stdin.buffer):
+        if key == VALUES_KEY:
+            moments.extend(unpack_values(val))
+        elif key == "moments":
+            moments.merge(Moments.from_payload(val))
+        else:
+            moments.push(float(val))
+    if moments.n:
+        write_record(sys.stdout.buffer, "moments", moments.to_payload())
+    sys.exit(0)
+
+for line in sys.stdin:
+    key, val = line.rstrip('\n').split('\t', 1)
+    if key == "moments":
+        moments.merge(Moments.from_payload(val))
+    else:
+        moments.push(float(val))
+
+if moments.n:
+    print(moments.to_record())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Synthetic inputs for scale testing, with exact ground truth.
+
+Streams COUNT values in the kaggleinput one-number-per-line format from a
+seeded distribution and writes <output>.truth.json next to it with the
+exact statistics of the values written (count, min, max, moments, median
+and 90th percentile, plus the reducer output lines for "all"). Values are
+multiples of QUANTUM and written with repr(), so every engine parses back
+exactly the doubles the truth was computed from.
+
+    python generate_dataset.py generate lognormal 100000000 -o kaggleinput/synthetic_lognormal.txt
+    python stats_reducer.py all < mapped.txt > out.txt
+    python generate_dataset.py check kaggleinput/synthetic_lognormal.txt.truth.json out.txt
+
+Exact quantiles never hold the whole stream in memory: a random sample
+brackets each target rank, and a second pass regenerates the stream from
+the seed and keeps only the values inside the brackets.
+"""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import numpy as np
+from stats_core import Moments, median_indices, percentile_index, order_statistics
+
+# Values are rounded to multiples of this (exact in binary) to keep the files compact
+QUANTUM = 1 / 1024
+DEFAULT_CHUNK = 1 << 20
+# Values sampled per stream to bracket the exact quantiles
+SAMPLE_SIZE = 1 << 20
+# Half-width of a quantile bracket, in standard errors of the sample rank
+BRACKET_SIGMAS = 6
+# Range of the sorted and reverse-sorted streams
+SORTED_SCALE = 1000.0
+
+# Independent, identically distributed streams
+IID_DISTRIBUTIONS = {
+    'normal': lambda rng, size: rng.normal(100.0, 15.0, size),
+    'lognormal': lambda rng, size: rng.lognormal(3.0, 1.0, size),
+    # Pareto with alpha 1.5: finite mean, infinite variance
+    'heavy_tailed': lambda rng, size: (rng.pareto(1.5, size) + 1.0) * 10.0,
+    # 100 distinct integer values, so most values are ties
+    'duplicates': lambda rng, size: rng.integers(0, 100, size).astype(np.float64)
+}
+DISTRIBUTIONS = tuple(IID_DISTRIBUTIONS) + ('sorted', 'reverse_sorted')
+
+def _quantize(values):
+    return np.round(values / QUANTUM) * QUANTUM
+
+def generate_chunks(distribution: str, count: int, seed: int, chunk_size: int = DEFAULT_CHUNK):
+    """Yield the stream as float64 arrays; the same arguments always yield the same values"""
+    rng = np.random.default_rng(seed)
+    if distribution in IID_DISTRIBUTIONS:
+        draw = IID_DISTRIBUTIONS[distribution]
+        for start in range(0, count, chunk_size):
+            yield _quantize(draw(rng, min(chunk_size, count - start)))
+        return
+
+    # Uniform order statistics from the largest down: X(n) = U^(1/n), X(i) = X(i+1) * U^(1/i)
+    log_top = 0.0
+    remaining = count
+    while remaining:
+        size = min(chunk_size, remaining)
+        ranks = np.arange(remaining, remaining - size, -1, dtype=np.float64)
+        logs = log_top + np.cumsum(np.log1p(-rng.random(size)) / ranks)
+        log_top = logs[-1]
+        remaining -= size
+        descending = np.exp(logs)
+        yield _quantize(SORTED_SCALE * (descending if distribution == 'reverse_sorted' else 1.0 - descending))
+
+def _target_ranks(count: int) -> list:
+    return median_indices(count) + [percentile_index(count, 90)]
+
+def _brackets(sample, count: int, ranks: list) -> list:
+    """Value intervals that contain the given ranks of the full stream with high probability"""
+    sample = np.sort(sample)
+    m = len(sample)
+    brackets = []
+    for rank in ranks:
+        p = (rank + 0.5) / count
+        spread = BRACKET_SIGMAS * math.sqrt(m * p * (1 - p)) + 1
+        lo_index, hi_index = int(p * m - spread), int(p * m + spread)
+        brackets.append((sample[lo_index] if lo_index >= 0 else -math.inf,
+                         sample[hi_index] if hi_index < m else math.inf))
+    return brackets
+
+def exact_order_statistics(distribution: str, count: int, seed: int, chunk_size: int, sample, ranks: list) -> list:
+    """Values at the given ranks, found by regenerating the stream and keeping only bracketed values"""
+    brackets = _brackets(sample, count, ranks)
+    while True:
+        below = [0] * len(ranks)
+        inside = [[] for _ in ranks]
+        for chunk in generate_chunks(distribution, count, seed, chunk_size):
+            for i, (lo, hi) in enumerate(brackets):
+                below[i] += int(np.count_nonzero(chunk < lo))
+                inside[i].append(chunk[(chunk >= lo) & (chunk <= hi)])
+
+        results, retry = [], []
+        for i, rank in enumerate(ranks):
+            values = np.concatenate(inside[i])
+            if below[i] <= rank < below[i] + len(values):
+                results.append(order_statistics(values, [rank - below[i]])[0])
+            else:
+                retry.append(i)
+        if not retry:
+            return results
+        # The sample was unlucky: widen the failed brackets to the whole range and try again
+        print("Quantile bracket missed; rescanning", file=sys.stderr)
+        for i in retry:
+            brackets[i] = (-math.inf, math.inf)
+
+def generate(distribution: str, count: int, output: str, seed: int = 0, chunk_size: int = DEFAULT_CHUNK) -> dict:
+    """Write the stream to output (or stdout for '-') and return its ground truth"""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    start = time.time()
+    moments = Moments()
+    sample_rate = min(1.0, SAMPLE_SIZE / count)
+    sampler = np.random.default_rng([seed, 1])
+    samples = []
+
+    stream = sys.stdout if output == '-' else open(output, 'w')
+    try:
+        written = 0
+        for chunk in generate_chunks(distribution, count, seed, chunk_size):
+            stream.write('\n'.join(map(repr, chunk.tolist())))
+            stream.write('\n')
+            moments.merge(Moments.from_array(chunk))
+            samples.append(chunk if sample_rate == 1.0 else chunk[sampler.random(len(chunk)) < sample_rate])
+            written += len(chunk)
+            if output != '-':
+                print(f"\r{written}/{count} values", end='', file=sys.stderr)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+            print(file=sys.stderr)
+
+    ranks = _target_ranks(count)
+    sample = np.concatenate(samples)
+    if sample_rate == 1.0:
+        selected = order_statistics(sample, ranks)
+    else:
+        selected = exact_order_statistics(distribution, count, seed, chunk_size, sample, ranks)
+    middle = selected[:-1]
+
+    truth = {
+        'distribution': distribution,
+        'count': count,
+        'seed': seed,
+        'chunk_size': chunk_size,
+        'quantum': QUANTUM,
+        'statistics': {
+            'min': moments.min,
+            'max': moments.max,
+            'mean': moments.mean,
+            'stddev': moments.stddev(),
+            'skewness': moments.skewness(),
+            'kurtosis': moments.kurtosis(),
+            'median': sum(middle) / len(middle),
+            'percentile90': selected[-1]
+        },
+        # What stats_reducer.py all prints for this input
+        'expected_output': [
+            f"Median\t{sum(middle) / len(middle)}",
+            f"StandardDeviation\t{moments.stddev()}",
+            f"Min-Max\t{moments.min:.4f}-{moments.max:.4f}",
+            f"90thPercentile\t{selected[-1]}",
+            f"Skewness\t{moments.skewness()}",
+            f"Kurtosis\t{moments.kurtosis()}"
+        ],
+        'generation_seconds': time.time() - start
+    }
+    if output != '-':
+        with open(f"{output}.truth.json", 'w') as f:
+            json.dump(truth, f, indent=4)
+    return truth
+
+def check(truth: dict, output_lines: list, rel_tol: float = 1e-9, keys=None) -> list:
+    """Compare reducer output lines with the ground truth; return a list of mismatch descriptions.
+
+    Every expected key (or every one of keys, for single-function output) must be present.
+    """
+    expected = dict(line.split('\t', 1) for line in truth['expected_output'])
+    lines = dict(line.split('\t', 1) for line in output_lines if '\t' in line)
+    approx = 'RankErrorBound' in lines
+    problems = []
+    for key in keys or expected:
+        if key not in expected:
+            problems.append(f"{key}: not in the truth file")
+            continue
+        if key not in lines:
+            problems.append(f"{key}: missing from the output")
+            continue
+        value = lines[key]
+        if key in ('Median', '90thPercentile') and approx:
+            continue  # Sketch estimates are only bounded in rank, not in value
+        if key in ('Median', '90thPercentile', 'Min-Max'):
+            ok = value == expected[key]
+        else:
+            ok = math.isclose(float(value), float(expected[key]), rel_tol=rel_tol)
+        if not ok:
+            problems.append(f"{key}: got {value}, expected {expected[key]}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic inputs with ground truth, or check results against it")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="stream values to a file and write <file>.truth.json")
+    gen.add_argument('distribution', choices=DISTRIBUTIONS)
+    gen.add_argument('count', type=lambda text: int(float(text)), help="number of values, e.g. 1e6")
+    gen.add_argument('-o', '--output', default=None,
+                     help="output file, '-' for stdout (default: kaggleinput/synthetic_<distribution>_<count>.txt)")
+    gen.add_argument('--seed', type=int, default=0)
+    gen.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK,
+                     help="values generated per batch; part of the stream's identity together with the seed")
+
+    chk = commands.add_parser('check', help="compare reducer output with a truth file")
+    chk.add_argument('truth_file')
+    chk.add_argument('results', nargs='?', default='-', help="reducer output file (default: stdin)")
+    chk.add_argument('--rel-tol', type=float, default=1e-9,
+                     help="relative tolerance for standard deviation, skewness and kurtosis")
+    chk.add_argument('--keys', default=None,
+                     help="comma-separated output keys to check, e.g. Median for a median job (default: all)")
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        if args.count < 1:
+            parser.error("count must be at least 1")
+        output = args.output or os.path.join('kaggleinput', f"synthetic_{args.distribution}_{args.count}.txt")
+        truth = generate(args.distribution, args.count, output, args.seed, args.chunk_size)
+        print("\n".join(truth['expected_output']), file=sys.stderr)
+        if output != '-':
+            print(f"Wrote {output} and {output}.truth.json in {truth['generation_seconds']:.1f}s", file=sys.stderr)
+    else:
+        with open(args.truth_file, 'r') as f:
+            truth = json.load(f)
+        if args.results == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(args.results, 'r') as f:
+                lines = f.read().splitlines()
+        problems = check(truth, lines, args.rel_tol, args.keys.split(',') if args.keys else None)
+        for problem in problems:
+            print(problem)
+        print("OK" if not problems else f"{len(problems)} mismatches")
+        sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
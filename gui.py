@@ -2,30 +2,39 @@ import tkinter as tk
 from tkinter import messagebox, scrolledtext, ttk
 import subprocess
 import threading
+import queue
+import itertools
 import os
+import sys
 import time
-from datetime import datetime
+import signal
+import sqlite3
+from datetime import datetime, timedelta
 
 try:
     import matplotlib
     matplotlib.use('TkAgg')  # Set the backend before importing pyplot
-    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 except ImportError as e:
     print(f"Error importing matplotlib: {e}")
     print("Please ensure matplotlib is installed: pip install matplotlib")
     raise
 
-try:
-    import pandas as pd
-except ImportError as e:
-    print(f"Error importing pandas: {e}")
-    print("Please ensure pandas is installed: pip install pandas")
-    raise
+from result_cache import ResultCache
+from performance_monitor import new_run_id, run_metrics_path, read_metrics_records
+from job_progress import JobProgress, COUNTER_GROUP, RECORDS_COUNTER
+from job_history import HISTORY_DB, record_run, query_runs, compare_runs, distinct_values
 
 # === Constants ===
 HADOOP_STREAMING_JAR = r"C:/hadoop-2.7.7/share/hadoop/tools/lib/hadoop-streaming-2.7.7.jar"
 
+# === Execution backends ===
+BACKENDS = {
+    "Hadoop Streaming": "hadoop",
+    "Local (all cores)": "local"
+}
+
 # === Color Scheme - Modern Dark Theme ===
 COLORS = {
     "bg_dark": "#121212",          # Primary background
@@ -48,43 +57,58 @@ jobs = {
     "Standard Deviation": ("stddev", COLORS["chart_colors"][1]),
     "Min-Max Normalization": ("minmax", COLORS["chart_colors"][2]),
     "90th Percentile": ("percentile", COLORS["chart_colors"][3]),
-    "Skewness": ("skewness", COLORS["chart_colors"][4])
+    "Skewness": ("skewness", COLORS["chart_colors"][4]),
+    "All Statistics": ("all", COLORS["accent_secondary"])
+}
+
+# Moment-based functions let each mapper emit one mergeable partial instead of every value.
+# Exact quantiles keep raw values: "counts" mappers only pay off on duplicate-heavy columns.
+MAPPER_MODES = {
+    "stddev": "moments",
+    "skewness": "moments",
+    "minmax": "moments"
 }
+# Jobs whose map output the combiner can fold into one moments record per map task
+COMBINER_FUNCTIONS = {"stddev", "skewness", "minmax"}
+# Scripts every streaming task imports; shipped to the task nodes with -files
+HADOOP_JOB_FILES = ["mapper.py", "combiner.py", "stats_reducer.py", "stats_core.py", "job_progress.py"]
+PYTHON_EXE = "C:/Users/abdul/AppData/Local/Programs/Python/Python313/python.exe"
 
 # === Performance Metrics ===
 class PerformanceMetrics:
+    """Runtime aggregates of this session's computed runs.
+
+    The job history is the source of the results tab; these only stand in
+    for it when the history database cannot be read.
+    """
     def __init__(self):
-        self.metrics = []
-        self.df = pd.DataFrame(columns=['Function', 'Value', 'Runtime', 'Dataset', 'Timestamp'])
+        # Function -> [runs, total, min, max] runtime of computed (non-cache) runs
+        self.aggregates = {}
+        self.lock = threading.Lock()
     
-    def add_metric(self, function, value, runtime, dataset):
-        timestamp = datetime.now()
-        # Convert runtime to float using iloc[0] if it's a Series
-        if isinstance(runtime, pd.Series):
-            runtime = float(runtime.iloc[0])
-        else:
-            runtime = float(runtime)
-            
-        self.metrics.append({
-            'Function': function,
-            'Value': value,
-            'Runtime': runtime,
-            'Dataset': dataset,
-            'Timestamp': timestamp
-        })
-        self.df = pd.DataFrame(self.metrics)
-    
-    def get_latest_metrics(self):
-        return self.df.sort_values('Timestamp', ascending=False)
+    def add_metric(self, function, runtime, source="hadoop"):
+        runtime = float(runtime)
+        # Cache hits take no compute time and would skew the runtime comparison
+        if source == "cache":
+            return
+        with self.lock:
+            aggregate = self.aggregates.get(function)
+            if aggregate is None:
+                self.aggregates[function] = [1, runtime, runtime, runtime]
+            else:
+                aggregate[0] += 1
+                aggregate[1] += runtime
+                aggregate[2] = min(aggregate[2], runtime)
+                aggregate[3] = max(aggregate[3], runtime)
     
-    def get_comparison_data(self):
-        if self.df.empty:
-            return pd.DataFrame(columns=['Function', 'mean', 'min', 'max'])
-        # Ensure Runtime column is float type
-        self.df['Runtime'] = self.df['Runtime'].astype(float)
-        return self.df.groupby('Function')['Runtime'].agg(['mean', 'min', 'max']).reset_index()
+    def comparison_rows(self):
+        """(function, mean, min, max) runtime per function, sorted by function"""
+        with self.lock:
+            return [(function, total / runs, low, high)
+                    for function, (runs, total, low, high) in sorted(self.aggregates.items())]
 
 performance_metrics = PerformanceMetrics()
+result_cache = ResultCache()
 
 # === Helper Functions ===
 def get_input_files():
@@ -122,210 +146,692 @@ def set_status(message, status_type="info"):
     else:  # info
         status_frame.config(bg=COLORS["accent_primary"])
 
-def restore_ui_state():
-    output_text.insert(tk.END, "[UI] Ready for new job\n")
-    for btn in function_buttons:
-        btn.config(state="normal")
-    # Enable all tabs
-    notebook.tab(0, state="normal")
-    notebook.tab(1, state="normal")
-    notebook.tab(2, state="normal")
+def parse_result_lines(text):
+    """Return every (function, value) pair in reducer output; "all" jobs emit several."""
+    results = []
+    for line in text.strip().splitlines():
+        parts = line.strip().split('\t')
+        if len(parts) == 2:
+            key, val = parts[0], parts[1]
+            if key == "Min-Max":
+                key = "Min-Max Normalization"
+            results.append((key, val))
+    return results or [("Unknown", "N/A")]
 
-def extract_result_from_hdfs(output_dir):
+def extract_results_from_hdfs(job):
     try:
-        cmd = f"hadoop fs -cat {output_dir}/part-00000"
+        cmd = f"hadoop fs -cat {job.output_dir}/part-00000"
         result = subprocess.check_output(cmd, shell=True, text=True)
-        output_text.insert(tk.END, f"\n[HDFS Output]\n{result}\n")
-        lines = result.strip().splitlines()
-        for line in lines:
-            parts = line.strip().split('\t')
-            if len(parts) == 2:
-                key, val = parts[0], parts[1]
-                if key == "Min-Max":
-                    return "Min-Max Normalization", val
-                return key, val
-        return "Unknown", "N/A"
+        log(job, f"[HDFS Output]\n{result}\n")
+        return parse_result_lines(result)
     except Exception as e:
-        output_text.insert(tk.END, f"[ERROR] Failed to read result: {e}\n")
-        return "Error", "N/A"
+        log(job, f"[ERROR] Failed to read result: {e}\n")
+        return [("Error", "N/A")]
 
 def safe_exit():
-    if status_var.get().startswith("Running"):
-        messagebox.showwarning("Wait", "Job is running. Please wait.")
-    else:
-        root.quit()
+    running, queued = job_queue.counts()
+    if running or queued:
+        if not messagebox.askyesno("Jobs in progress",
+                                   f"{running} job(s) running and {queued} queued. Cancel them and exit?"):
+            return
+        job_queue.cancel_all()
+    root.quit()
 
-def update_performance_chart():
-    """Update performance chart with runtime data from executed jobs."""
-    if not performance_metrics.metrics:
-        return
-    
-    # Clear previous chart
-    for widget in chart_frame.winfo_children():
-        widget.destroy()
-    
-    # Create single chart
-    fig = plt.figure(figsize=(10, 5), dpi=100)
-    fig.patch.set_facecolor(COLORS["bg_dark"])
-    ax = fig.add_subplot(111)
+class RuntimeChart:
+    """Runtime-by-function bar chart; one figure whose artists are updated in place."""
+    def __init__(self, master):
+        self.figure = Figure(figsize=(10, 5), dpi=100, layout='tight')
+        self.figure.patch.set_facecolor(COLORS["bg_dark"])
+        self.ax = self.figure.add_subplot(111)
+        self.functions = None
+        self.artists = []
+        
+        # Style the chart
+        self.ax.set_title('Runtime Performance by Function',
+                          color=COLORS["fg"],
+                          fontsize=12,
+                          fontweight='bold')
+        self.ax.set_ylabel('Runtime (seconds)', color=COLORS["fg"], fontsize=11)
+        self.ax.set_facecolor(COLORS["bg_dark"])
+        self.ax.tick_params(colors=COLORS["fg"], labelsize=10)
+        for spine in self.ax.spines.values():
+            spine.set_color(COLORS["border"])
+        self.ax.grid(True, linestyle='--', alpha=0.2, color=COLORS["fg"])
+        
+        # Embed chart in tkinter
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
     
-    # Get data for comparison
-    comparison_data = performance_metrics.get_comparison_data()
+    def _clear(self):
+        for artist in self.artists:
+            artist.remove()
+        self.artists = []
+        self.functions = None
     
-    if not comparison_data.empty:
-        x = range(len(comparison_data['Function']))
-        functions = comparison_data['Function'].values
-        
-        # Bar chart data
-        mean_values = comparison_data['mean'].values.astype(float)
-        min_values = comparison_data['min'].values.astype(float)
-        max_values = comparison_data['max'].values.astype(float)
-        
-        # Create bars with custom colors based on function
-        bars = ax.bar(
-            x, mean_values, 
+    def _build(self, functions):
+        """Create the bars, min-max whiskers and labels for a new set of functions"""
+        self._clear()
+        x = range(len(functions))
+        
+        # Bars with custom colors based on function
+        self.bars = self.ax.bar(
+            x, [0] * len(functions),
             width=0.6,
-            yerr=[mean_values - min_values, max_values - mean_values],
-            capsize=4,
-            color=[jobs.get(func, (None, COLORS["chart_colors"][i % len(COLORS["chart_colors"])]))[1] 
-                  for i, func in enumerate(functions)],
+            color=[jobs.get(func, (None, COLORS["chart_colors"][i % len(COLORS["chart_colors"])]))[1]
+                   for i, func in enumerate(functions)],
             alpha=0.8,
             label='Average Runtime'
         )
-        
-        # Style the chart
-        ax.set_title('Runtime Performance by Function', 
-                   color=COLORS["fg"],
-                   fontsize=12,
-                   fontweight='bold')
-        
-        # Set x-axis labels
-        ax.set_xticks(x)
-        ax.set_xticklabels(functions, rotation=25, ha='right', fontsize=10)
-        
-        # Set y-axis labels
-        ax.set_ylabel('Runtime (seconds)', color=COLORS["fg"], fontsize=11)
-        
-        # Style chart appearance
-        ax.set_facecolor(COLORS["bg_dark"])
-        ax.tick_params(colors=COLORS["fg"], labelsize=10)
-        ax.spines['bottom'].set_color(COLORS["border"])
-        ax.spines['top'].set_color(COLORS["border"])
-        ax.spines['left'].set_color(COLORS["border"])
-        ax.spines['right'].set_color(COLORS["border"])
-        
-        # Add grid for readability
-        ax.grid(True, linestyle='--', alpha=0.2, color=COLORS["fg"])
-        
-        # Add value labels
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(
-                bar.get_x() + bar.get_width()/2., 
-                height + 0.1,
-                f'{height:.2f}s',
-                ha='center',
-                va='bottom',
-                color=COLORS["fg"],
-                fontsize=9
-            )
-        
-        # Add legend with custom styling
-        legend = ax.legend(
-            loc='upper right', 
+        # Min-max range of each function
+        self.whiskers = self.ax.vlines(x, 0, 0, colors=COLORS["fg"], linewidth=1)
+        self.caps, = self.ax.plot([], [], linestyle='none', marker='_', markersize=8, color=COLORS["fg"])
+        self.labels = [
+            self.ax.text(i, 0, '', ha='center', va='bottom', color=COLORS["fg"], fontsize=9)
+            for i in x
+        ]
+        
+        self.ax.set_xticks(list(x))
+        self.ax.set_xticklabels(functions, rotation=25, ha='right', fontsize=10)
+        
+        # Legend with custom styling
+        legend = self.ax.legend(
+            loc='upper right',
             framealpha=0.8,
-            facecolor=COLORS["bg_medium"], 
+            facecolor=COLORS["bg_medium"],
             edgecolor=COLORS["border"]
         )
         for text in legend.get_texts():
             text.set_color(COLORS["fg"])
+        
+        # The bar container, so removing it also drops it from the legend
+        self.artists = [self.bars, self.whiskers, self.caps] + self.labels
+        self.functions = functions
     
-    plt.tight_layout()
-    
-    # Embed chart in tkinter
-    canvas = FigureCanvasTkAgg(fig, master=chart_frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+    def update(self, rows):
+        """Show (function, mean, min, max) rows; only a new function rebuilds the artists"""
+        if not rows:
+            if self.functions:
+                self._clear()
+                self.ax.get_legend().remove()
+                self.ax.set_xticks([])
+                self.canvas.draw_idle()
+            return
+        functions = [row[0] for row in rows]
+        if functions != self.functions:
+            self._build(functions)
+        
+        for i, (_, mean, low, high) in enumerate(rows):
+            self.bars[i].set_height(mean)
+            self.labels[i].set_position((i, mean + 0.1))
+            self.labels[i].set_text(f'{mean:.2f}s')
+        self.whiskers.set_segments([[(i, low), (i, high)] for i, (_, _, low, high) in enumerate(rows)])
+        self.caps.set_data(list(range(len(rows))) * 2, [row[2] for row in rows] + [row[3] for row in rows])
+        
+        top = max(max(row[3], row[1] + 0.1) for row in rows)
+        self.ax.set_ylim(0, top * 1.15)
+        self.canvas.draw_idle()
 
-def run_job(job_label):
+# === Job History View ===
+SESSION_START = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+ALL_FILTER = "All"
+# Rows shown in the results table; the chart aggregates every matching run
+RESULTS_LIMIT = 500
+PERIODS = {
+    "This session": lambda: SESSION_START,
+    "Today": lambda: datetime.now().strftime('%Y-%m-%d'),
+    "Last 7 days": lambda: (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'),
+    "Last 30 days": lambda: (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S'),
+    "All time": lambda: None
+}
+results_refresh_pending = False
+
+def format_result(text):
+    """Table cell for stored reducer output: the value alone, or name=value pairs for several statistics"""
+    pairs = parse_result_lines(text or "")
+    if len(pairs) == 1:
+        return pairs[0][1]
+    return ", ".join(f"{key}={value}" for key, value in pairs)
+
+def history_filters():
+    filters = {column: var.get() for column, var in history_filter_vars.items()}
+    return {column: (None if value == ALL_FILTER else value) for column, value in filters.items()}
+
+def update_performance_chart():
+    """Reload the results table and chart from the job history, using the current filters."""
+    global results_refresh_pending
+    results_refresh_pending = False
+    filters = history_filters()
+    since = PERIODS[period_var.get()]()
+    try:
+        runs = query_runs(HISTORY_DB, since=since, limit=RESULTS_LIMIT, **filters)
+        comparison = compare_runs(HISTORY_DB, since=since, **filters)
+        for column, dropdown in history_filter_dropdowns.items():
+            dropdown["values"] = [ALL_FILTER] + distinct_values(column, HISTORY_DB)
+    except sqlite3.Error as e:
+        # Without the history, show what this session has recorded in memory
+        set_status(f"Job history unavailable: {e}", "error")
+        runtime_chart.update(performance_metrics.comparison_rows())
+        return
+
+    result_table.delete(*result_table.get_children())
+    for run in runs:
+        runtime = run['runtime_seconds'] if run['runtime_seconds'] is not None else run['wall_seconds']
+        result_table.insert("", "end", values=(
+            run['timestamp'], run['function'], format_result(run['result']),
+            "" if runtime is None else f"{runtime:.2f}", run['dataset'], run['backend'], run['source']
+        ))
+    # One bar per function, or per function and backend when several backends match
+    several_backends = len({row['backend'] for row in comparison}) > 1
+    runtime_chart.update([
+        (f"{row['function']} ({row['backend']})" if several_backends else row['function'],
+         row['mean'], row['min'], row['max'])
+        for row in comparison if row['mean'] is not None
+    ])
+
+def schedule_results_refresh():
+    """Refresh the results tab once for any number of jobs finishing close together"""
+    global results_refresh_pending
+    if not results_refresh_pending:
+        results_refresh_pending = True
+        root.after(200, update_performance_chart)
+
+# === Job Queue ===
+# Statuses a job can no longer leave
+FINISHED_STATUSES = ("Done", "Cached", "Failed", "Cancelled")
+DEFAULT_MAX_JOBS = 2
+MAX_JOBS_LIMIT = 8
+# Minimum seconds between queue-view refreshes of one job's progress
+PROGRESS_REFRESH_SECONDS = 0.5
+# Seconds between live counter queries for a running Hadoop job
+COUNTER_POLL_SECONDS = 5
+
+class Job:
+    """One (input file, function) run waiting in or taken from the queue."""
+    def __init__(self, job_id, label, input_file, backend, use_cache=True, keep_output=False):
+        self.id = job_id
+        self.label = label
+        self.key = jobs[label][0]
+        self.input_file = input_file
+        self.backend = backend
+        # Options read from the Tk variables when the job was queued
+        self.use_cache = use_cache
+        self.keep_output = keep_output
+        self.output_dir = f"/kaggle_output_{self.key}"
+        self.status = "Queued"
+        self.duration = None
+        self.process = None
+        self.cancelled = False
+        self.run_id = new_run_id()
+        # Full output, however long; the console keeps only the most recent lines
+        self.log_path = os.path.join(LOG_DIR, f"job_{job_id}_{self.run_id}.log")
+        self.log_file = None
+        # Set by close_log once the job is over; later lines only reach the console
+        self.log_closed = False
+        self.log_lock = threading.Lock()
+        # Set once the input is in HDFS; local jobs read kaggleinput directly
+        self.staged = threading.Event()
+        if backend != "hadoop":
+            self.staged.set()
+        self.progress = JobProgress()
+        self.counter_poller = None
+
+class JobQueue:
+    """Runs queued jobs on at most max_jobs worker threads.
+
+    Hadoop jobs that write the same output directory never run at the same
+    time. A stager thread uploads each Hadoop job's input while earlier jobs
+    run, so a job can start as soon as a worker slot frees up.
+    """
+    def __init__(self, on_change, max_jobs=DEFAULT_MAX_JOBS):
+        self.on_change = on_change
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.pending = []
+        self.running = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.to_stage = queue.Queue()
+        # HDFS copies made this session: file name -> (size, mtime) of the uploaded file
+        self.staged_inputs = {}
+        self.hdfs_dir_ready = False
+        threading.Thread(target=self._stage_loop, daemon=True).start()
+
+    def submit(self, label, input_file, backend, use_cache=True, keep_output=False):
+        job = Job(next(self.ids), label, input_file, backend, use_cache, keep_output)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.pending.append(job)
+        self.on_change(job)
+        if not job.staged.is_set():
+            self.to_stage.put(job)
+        self._schedule()
+        return job
+
+    def set_max_jobs(self, max_jobs):
+        self.max_jobs = max(1, min(MAX_JOBS_LIMIT, max_jobs))
+        self._schedule()
+
+    def cancel(self, job_id):
+        """Drop a queued job, or stop a running one and everything it started"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                return
+            job.cancelled = True
+            if job in self.pending:
+                self.pending.remove(job)
+                job.status = "Cancelled"
+                close_log(job)
+            process = job.process
+        if process and process.poll() is None:
+            # mapred and taskkill take a while; keep them off the Tk thread
+            threading.Thread(target=stop_job, args=(job, process), daemon=True).start()
+        self.on_change(job)
+
+    def cancel_all(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def clear_finished(self):
+        """Forget finished jobs; returns their ids"""
+        with self.lock:
+            done = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]
+            for job_id in done:
+                del self.jobs[job_id]
+        return done
+
+    def counts(self):
+        with self.lock:
+            return len(self.running), len(self.pending)
+
+    def running_jobs(self):
+        with self.lock:
+            return list(self.running.values())
+
+    def _schedule(self):
+        """Start pending jobs that are staged and independent of the running ones, up to max_jobs"""
+        started = []
+        with self.lock:
+            busy_dirs = {job.output_dir for job in self.running.values() if job.backend == "hadoop"}
+            for job in list(self.pending):
+                if len(self.running) >= self.max_jobs:
+                    break
+                if not job.staged.is_set():
+                    continue
+                if job.backend == "hadoop":
+                    if job.output_dir in busy_dirs:
+                        continue
+                    busy_dirs.add(job.output_dir)
+                self.pending.remove(job)
+                self.running[job.id] = job
+                job.status = "Running"
+                started.append(job)
+        for job in started:
+            self.on_change(job)
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        try:
+            status = execute_job(job)
+        except Exception as e:
+            log(job, f"[FATAL ERROR] {e}\n")
+            status = "Failed"
+        with self.lock:
+            job.status = "Cancelled" if job.cancelled else status
+            job.process = None
+            del self.running[job.id]
+        close_log(job)
+        self.on_change(job)
+        self._schedule()
+
+    def _stage_loop(self):
+        while True:
+            job = self.to_stage.get()
+            if not job.cancelled:
+                self._stage(job)
+            job.staged.set()
+            self._schedule()
+
+    def _stage(self, job):
+        """Upload the job's input to /kaggleinput unless this session already put the same file there"""
+        local_path = os.path.join("kaggleinput", job.input_file)
+        try:
+            stat = os.stat(local_path)
+        except OSError:
+            return  # Nothing to upload; the job reports the missing input
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self.staged_inputs.get(job.input_file) == signature:
+            return
+
+        with self.lock:
+            if job.status == "Queued":
+                job.status = "Staging"
+        self.on_change(job)
+        if not self.hdfs_dir_ready:
+            subprocess.run(["hadoop", "fs", "-mkdir", "-p", "/kaggleinput"], shell=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.hdfs_dir_ready = True
+        result = subprocess.run(["hadoop", "fs", "-put", "-f", local_path, f"/kaggleinput/{job.input_file}"],
+                                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode == 0:
+            self.staged_inputs[job.input_file] = signature
+            log(job, f"[STAGE] Uploaded {job.input_file} to /kaggleinput\n")
+        else:
+            # The file may already be in HDFS from an earlier session; let the job try
+            log(job, f"[WARNING] Could not upload {job.input_file}: {result.stderr.strip()}\n")
+        with self.lock:
+            if job.status == "Staging":
+                job.status = "Queued"
+        self.on_change(job)
+
+# === Log Streaming ===
+# Worker threads never touch Tk widgets: log lines and UI updates go through
+# queues that drain_ui_queues empties on the Tk event loop.
+LOG_DIR = os.path.join("performance_logs", "job_logs")
+LOG_POLL_MS = 100
+# Most queued log lines moved into the console per poll; a larger backlog is
+# drained over several polls so the event loop keeps handling input
+LOG_BATCH_LINES = 2000
+DEFAULT_OUTPUT_LINES = 5000
+
+log_queue = queue.Queue()
+ui_calls = queue.Queue()
+
+def call_in_ui(func, *args):
+    """Run func(*args) on the Tk thread at the next poll; safe from any thread"""
+    ui_calls.put((func, args))
+
+def post_message(text):
+    """Queue a line for the output console; safe from any thread"""
+    log_queue.put(text)
+
+def log(job, text, console=True):
+    """Spool a job's output to its log file and queue it for the console"""
+    with job.log_lock:
+        # A late line (counter poller, stop_job) after close_log only reaches the console;
+        # reopening the file would leak the handle and keep the log locked on Windows
+        if not job.log_closed:
+            if job.log_file is None:
+                os.makedirs(LOG_DIR, exist_ok=True)
+                job.log_file = open(job.log_path, 'a', encoding='utf-8')
+            job.log_file.write(text)
+    if console:
+        log_queue.put(f"[job {job.id}] {text}")
+
+def close_log(job):
+    with job.log_lock:
+        job.log_closed = True
+        if job.log_file is not None:
+            job.log_file.close()
+            job.log_file = None
+
+def output_line_limit():
+    try:
+        return max(100, int(output_lines_var.get()))
+    except (ValueError, tk.TclError):
+        return DEFAULT_OUTPUT_LINES
+
+def drain_ui_queues():
+    """Apply queued UI updates and append one batch of log lines, then reschedule"""
+    while True:
+        try:
+            func, args = ui_calls.get_nowait()
+        except queue.Empty:
+            break
+        func(*args)
+
+    chunks = []
+    try:
+        while len(chunks) < LOG_BATCH_LINES:
+            chunks.append(log_queue.get_nowait())
+    except queue.Empty:
+        pass
+    if chunks:
+        output_text.insert(tk.END, "".join(chunks))
+        # Drop the oldest lines beyond the limit; the job log files keep everything
+        excess = int(output_text.index("end-1c").split(".")[0]) - output_line_limit()
+        if excess > 0:
+            output_text.delete("1.0", f"{excess + 1}.0")
+        output_text.see(tk.END)
+
+    root.after(1 if not log_queue.empty() else LOG_POLL_MS, drain_ui_queues)
+
+def record_results(job, results, duration, source):
+    # Add to performance metrics; a multi-statistic job is timed as one run
+    if len(results) == 1:
+        performance_metrics.add_metric(results[0][0], duration, source)
+    else:
+        performance_metrics.add_metric(job.label, duration, source)
+
+    # Persist the run; local runs already stored their resource metrics under the same run id
+    try:
+        record_run(job.run_id, HISTORY_DB, function=job.key, dataset=job.input_file, backend=job.backend,
+                   source=source, wall_seconds=duration, result="\n".join(f"{k}\t{v}" for k, v in results))
+    except sqlite3.Error as e:
+        log(job, f"[WARNING] Could not record the run in {HISTORY_DB}: {e}\n")
+
+    call_in_ui(schedule_results_refresh)
+
+def execute_job(job):
+    """Run one job to completion on a worker thread; returns its final status"""
+    job_key = job.key
+    cache_key = None
+    if job.use_cache:
+        cache_key = result_cache.key(os.path.join("kaggleinput", job.input_file), job_key)
+        cached = result_cache.get(cache_key)
+        if cached:
+            log(job, "[CACHE] Input and reducer unchanged; reusing stored result\n")
+            record_results(job, parse_result_lines("\n".join(cached['results'])), 0.0, "cache")
+            return "Cached"
+
+    if job.backend == "local":
+        # Run map and merge phases in a local process pool; no JVM or HDFS round-trips
+        metrics_path = run_metrics_path(job.run_id)
+        cmd = [sys.executable, "local_runner.py", job_key, os.path.join("kaggleinput", job.input_file),
+               "--input-name", job.input_file, "--metrics-out", metrics_path, "--progress",
+               "--run-id", job.run_id, "--history", HISTORY_DB]
+    else:
+        # A job cancelled while queued or staging must not touch HDFS
+        with job_queue.lock:
+            if job.cancelled:
+                return "Cancelled"
+        if not job.keep_output:
+            subprocess.run(["hadoop", "fs", "-rm", "-r", job.output_dir], shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            log(job, f"[INFO] Removed previous output directory: {job.output_dir}\n")
+        else:
+            log(job, f"[INFO] Keeping previous output directory: {job.output_dir}\n")
+
+        cmd = [
+            "C:/hadoop-2.7.7/bin/hadoop.cmd", "jar", HADOOP_STREAMING_JAR,
+            "-files", ",".join(HADOOP_JOB_FILES),
+            "-input", f"/kaggleinput/{job.input_file}",
+            "-output", job.output_dir,
+            "-mapper", f"{PYTHON_EXE} mapper.py {MAPPER_MODES.get(job_key, 'values')}",
+            "-reducer", f"{PYTHON_EXE} stats_reducer.py {job_key}"
+        ]
+        if job_key in COMBINER_FUNCTIONS:
+            cmd[-2:-2] = ["-combiner", f"{PYTHON_EXE} combiner.py"]
+
+    start = time.time()
+
+    log(job, f"[COMMAND] {' '.join(cmd)}\n")
+    log(job, f"[INFO] Full log: {job.log_path}\n")
+
+    # Launch under the queue lock: cancel() either sees the flag set here first and nothing
+    # starts, or it sees the process and stops it. Its own process group on POSIX, so a
+    # cancel reaches everything the command starts.
+    with job_queue.lock:
+        if job.cancelled:
+            return "Cancelled"
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+                                   start_new_session=os.name != "nt")
+        job.process = process
+    job.progress = JobProgress()
+    job_output = []
+    last_refresh = 0.0
+    for line in process.stdout:
+        # Reporter lines only feed the progress bar; the log file still gets them
+        if job.progress.feed(line):
+            log(job, line, console=False)
+        else:
+            job_output.append(line)
+            log(job, line)
+        if job.progress.hadoop_job_id and not job.counter_poller:
+            job.counter_poller = threading.Thread(target=poll_hadoop_counters, args=(job, process), daemon=True)
+            job.counter_poller.start()
+        now = time.monotonic()
+        if now - last_refresh >= PROGRESS_REFRESH_SECONDS:
+            last_refresh = now
+            job_queue.on_change(job)
+    process.wait()
+
+    duration = round(time.time() - start, 2)
+    job.duration = duration
+
+    if job.cancelled:
+        log(job, f"[INFO] Cancelled after {duration}s\n")
+        return "Cancelled"
+    if process.returncode != 0:
+        return "Failed"
+
+    if job.backend == "local":
+        results = parse_result_lines("".join(job_output))
+        for record in read_metrics_records(metrics_path):
+            log(job, f"[METRICS] {record['records_processed']} records, "
+                     f"{record['throughput']:.0f} records/s, "
+                     f"peak memory {record['max_memory_mb']:.1f} MB\n")
+    else:
+        results = extract_results_from_hdfs(job)
+
+    if cache_key and results[0][0] not in ("Unknown", "Error"):
+        result_cache.put(cache_key, job.input_file, job_key, [f"{k}\t{v}" for k, v in results], duration)
+
+    record_results(job, results, duration, job.backend)
+    return "Done"
+
+def kill_process_tree(process):
+    """Kill a command and every process it started.
+
+    terminate() alone only stops hadoop.cmd or local_runner.py; the Java
+    client or the pool workers they started keep the stdout pipe open.
+    """
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass  # Already gone
+
+def stop_job(job, process):
+    """Cancel a running job: its local processes and, once submitted, its Hadoop job on the cluster"""
+    # The cluster job first: the client is still running, so the job log is still open
+    if job.progress.hadoop_job_id:
+        result = subprocess.run(["mapred", "job", "-kill", job.progress.hadoop_job_id], shell=True,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode == 0:
+            log(job, f"[INFO] Killed Hadoop job {job.progress.hadoop_job_id}\n")
+        else:
+            log(job, f"[WARNING] Could not kill Hadoop job {job.progress.hadoop_job_id}: {result.stderr.strip()}\n")
+    kill_process_tree(process)
+
+def poll_hadoop_counters(job, process):
+    """Fetch a running Hadoop job's live record counter; the client only prints counters at the end"""
+    while True:
+        time.sleep(COUNTER_POLL_SECONDS)
+        if process.poll() is not None:
+            return
+        result = subprocess.run(["mapred", "job", "-counter", job.progress.hadoop_job_id, COUNTER_GROUP, RECORDS_COUNTER],
+                                shell=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        lines = result.stdout.split()
+        if result.returncode == 0 and lines and lines[-1].isdigit():
+            job.progress.set_total(RECORDS_COUNTER, int(lines[-1]))
+            job_queue.on_change(job)
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def progress_columns(job):
+    """Progress, records/s and ETA cells of a job's queue row"""
+    progress = job.progress
+    if job.status == "Done":
+        rate = progress.records / job.duration if job.duration else 0
+        return "100%", f"{rate:,.0f}" if progress.records else "", ""
+    if job.status != "Running":
+        return "", "", ""
+    fraction = progress.fraction()
+    eta = progress.eta_seconds()
+    return (f"{fraction:.0%}" if fraction is not None else "...",
+            f"{progress.records_per_second():,.0f}" if progress.records else "",
+            format_seconds(eta) if eta is not None else "")
+
+def update_overall_progress():
+    """Status bar progress: mean completed fraction of the running jobs"""
+    fractions = [job.progress.fraction() or 0.0 for job in job_queue.running_jobs()]
+    progress_var.set(100 * sum(fractions) / len(fractions) if fractions else 0)
+
+def refresh_job_row(job):
+    """Show a job's current status in the queue view and the status bar"""
+    runtime = "" if job.duration is None else f"{job.duration:.2f}"
+    status = f"{job.status}: {job.progress.phase}" if job.status == "Running" and job.progress.phase else job.status
+    values = (job.id, job.label, job.input_file, job.backend, status) + progress_columns(job) + (runtime,)
+    iid = str(job.id)
+    if queue_table.exists(iid):
+        queue_table.item(iid, values=values, tags=(job.status.lower(),))
+    else:
+        queue_table.insert("", "end", iid=iid, values=values, tags=(job.status.lower(),))
+
+    running, queued = job_queue.counts()
+    if job.status in FINISHED_STATUSES:
+        status_type = {"Failed": "error", "Cancelled": "warning"}.get(job.status, "success")
+        suffix = f" in {job.duration}s" if job.duration is not None and job.status == "Done" else ""
+        summary = f"Job {job.id} ({job.label}, {job.input_file}): {job.status.lower()}{suffix}"
+        if running or queued:
+            summary += f" | {running} running, {queued} queued"
+        set_status(summary, status_type)
+    else:
+        set_status(f"{running} running, {queued} queued", "warning")
+    update_overall_progress()
+
+job_queue = JobQueue(on_change=lambda job: call_in_ui(refresh_job_row, job))
+
+def enqueue_jobs(job_labels):
     selected_file = file_var.get()
     if not selected_file:
         messagebox.showwarning("Missing File", "Please select an input file.")
         return
 
-    job_key, color = jobs[job_label]
-    output_dir = f"/kaggle_output_{job_key}"
-
-    # Switch to the Job Output tab
+    backend = BACKENDS[backend_var.get()]
+    # Workers never read Tk variables; each job carries the options it was queued with
+    options = {"use_cache": use_cache.get(), "keep_output": skip_delete.get()}
+    for job_label in job_labels:
+        job = job_queue.submit(job_label, selected_file, backend, **options)
+        post_message(f"[QUEUE] Job {job.id}: {job_label} on {selected_file} ({backend})\n")
     notebook.select(1)
-    
-    # Update status
-    set_status(f"Running {job_label}...", "warning")
-    
-    # Clear output
-    output_text.delete(1.0, tk.END)
-    output_text.insert(tk.END, f"Starting {job_label} job with file {selected_file}...\n\n")
-
-    # Disable function buttons during job run
-    for btn in function_buttons:
-        btn.config(state="disabled")
-        
-    # Disable other tabs during processing
-    notebook.tab(0, state="disabled")
-    notebook.tab(2, state="disabled")
 
-    def thread_job():
-        try:
-            if not skip_delete.get():
-                subprocess.run(["hadoop", "fs", "-rm", "-r", output_dir], shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                output_text.insert(tk.END, f"[INFO] Removed previous output directory: {output_dir}\n")
-            else:
-                output_text.insert(tk.END, f"[INFO] Keeping previous output directory: {output_dir}\n")
+def run_job(job_label):
+    enqueue_jobs([job_label])
 
-            start = time.time()
+def run_all_functions():
+    """Queue every single-statistic function for the selected file"""
+    enqueue_jobs([label for label, (key, _) in jobs.items() if key != "all"])
 
-            cmd = [
-                "C:/hadoop-2.7.7/bin/hadoop.cmd", "jar", HADOOP_STREAMING_JAR,
-                "-input", f"/kaggleinput/{selected_file}",
-                "-output", output_dir,
-                "-mapper", "C:/Users/abdul/AppData/Local/Programs/Python/Python313/python.exe mapper.py",
-                "-reducer", f"C:/Users/abdul/AppData/Local/Programs/Python/Python313/python.exe stats_reducer.py {job_key}"
-            ]
+def cancel_selected_jobs():
+    for iid in queue_table.selection():
+        job_queue.cancel(int(iid))
 
-            output_text.insert(tk.END, f"[COMMAND] {' '.join(cmd)}\n\n")
-            
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
-            for line in process.stdout:
-                output_text.insert(tk.END, line)
-                output_text.see(tk.END)
-            process.wait()
-
-            duration = round(time.time() - start, 2)
-
-            if process.returncode == 0:
-                func, val = extract_result_from_hdfs(output_dir)
-                
-                # Add to performance metrics
-                performance_metrics.add_metric(func, val, duration, selected_file)
-                
-                # Update result table
-                root.after(0, lambda: result_table.insert("", "end", values=(func, val, duration, selected_file)))
-                
-                # Update status
-                root.after(0, lambda: set_status(f"{job_label} completed in {duration}s", "success"))
-                
-                # Update performance chart and switch to results tab
-                root.after(0, update_performance_chart)
-                root.after(100, lambda: notebook.select(2))
-            else:
-                root.after(0, lambda: set_status(f"{job_label} failed after {duration}s", "error"))
-        except Exception as e:
-            output_text.insert(tk.END, f"[FATAL ERROR] {e}\n")
-            root.after(0, lambda: set_status(f"Error: {str(e)[:50]}...", "error"))
-        finally:
-            root.after(0, restore_ui_state)
+def clear_finished_jobs():
+    for job_id in job_queue.clear_finished():
+        queue_table.delete(str(job_id))
 
-    threading.Thread(target=thread_job).start()
+def on_max_jobs_changed(*_):
+    try:
+        job_queue.set_max_jobs(int(max_jobs_var.get()))
+    except (ValueError, tk.TclError):
+        pass  # Mid-edit value in the spinbox
 
 # === Main GUI Class ===
 class BigDataGUI:
@@ -335,6 +841,7 @@ class BigDataGUI:
         self.setup_styles()
         self.create_notebook()
         self.create_status_bar()
+        self.root.after(LOG_POLL_MS, drain_ui_queues)
         
     def setup_window(self):
         """Configure the main window."""
@@ -405,6 +912,14 @@ class BigDataGUI:
             background=COLORS["bg_dark"]
         )
         
+        # Configure Progressbar style
+        self.style.configure(
+            "Status.Horizontal.TProgressbar",
+            background=COLORS["accent_success"],
+            troughcolor=COLORS["bg_dark"],
+            borderwidth=0
+        )
+        
         # Configure Scrollbar style
         self.style.configure(
             "TScrollbar",
@@ -421,12 +936,13 @@ class BigDataGUI:
         notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
         
         self.create_input_tab()
+        self.create_queue_tab()
         self.create_output_tab()
         self.create_results_tab()
         
     def create_input_tab(self):
         """Create the input/control tab."""
-        global file_var, file_dropdown, skip_delete, function_buttons
+        global file_var, file_dropdown, skip_delete, use_cache, backend_var, max_jobs_var, function_buttons
         
         input_frame = ttk.Frame(notebook, style="TFrame")
         notebook.add(input_frame, text="  Job Configuration  ")
@@ -542,6 +1058,78 @@ class BigDataGUI:
         )
         skip_checkbox.pack(anchor=tk.W)
         
+        use_cache = tk.BooleanVar(value=True)
+        
+        cache_checkbox = tk.Checkbutton(
+            skip_frame,
+            text="Reuse cached results when the input file is unchanged",
+            variable=use_cache,
+            bg=COLORS["bg_medium"],
+            fg=COLORS["fg"],
+            selectcolor=COLORS["bg_dark"],
+            activebackground=COLORS["bg_medium"],
+            activeforeground=COLORS["fg"],
+            font=("Segoe UI", 10)
+        )
+        cache_checkbox.pack(anchor=tk.W)
+        
+        # Execution backend selection
+        backend_frame = tk.Frame(file_selection_frame, bg=COLORS["bg_medium"])
+        backend_frame.pack(fill=tk.X, anchor=tk.W)
+        
+        tk.Label(
+            backend_frame,
+            text="Execution Backend:",
+            font=("Segoe UI", 10),
+            bg=COLORS["bg_medium"],
+            fg=COLORS["fg"]
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        backend_var = tk.StringVar(value="Hadoop Streaming")
+        
+        for backend_label in BACKENDS:
+            tk.Radiobutton(
+                backend_frame,
+                text=backend_label,
+                value=backend_label,
+                variable=backend_var,
+                bg=COLORS["bg_medium"],
+                fg=COLORS["fg"],
+                selectcolor=COLORS["bg_dark"],
+                activebackground=COLORS["bg_medium"],
+                activeforeground=COLORS["fg"],
+                font=("Segoe UI", 10)
+            ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Concurrency limit for the job queue
+        workers_frame = tk.Frame(file_selection_frame, bg=COLORS["bg_medium"], pady=10)
+        workers_frame.pack(fill=tk.X, anchor=tk.W)
+        
+        tk.Label(
+            workers_frame,
+            text="Max Concurrent Jobs:",
+            font=("Segoe UI", 10),
+            bg=COLORS["bg_medium"],
+            fg=COLORS["fg"]
+        ).pack(side=tk.LEFT, padx=(0, 10))
+        
+        max_jobs_var = tk.StringVar(value=str(DEFAULT_MAX_JOBS))
+        max_jobs_var.trace_add("write", on_max_jobs_changed)
+        
+        tk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=MAX_JOBS_LIMIT,
+            textvariable=max_jobs_var,
+            width=4,
+            font=("Segoe UI", 10),
+            bg=COLORS["bg_dark"],
+            fg=COLORS["fg"],
+            buttonbackground=COLORS["bg_light"],
+            insertbackground=COLORS["fg"],
+            relief=tk.FLAT
+        ).pack(side=tk.LEFT)
+        
         # Functions section - styled as a card
         functions_card = tk.Frame(
             main_container,
@@ -623,13 +1211,31 @@ class BigDataGUI:
                 col = 0
                 row += 1
         
+        # Queue every function at once to profile a file
+        all_btn = tk.Button(
+            functions_card,
+            text="Queue All Functions",
+            font=("Segoe UI", 11, "bold"),
+            bg=COLORS["accent_primary"],
+            fg=COLORS["fg"],
+            activebackground=COLORS["accent_secondary"],
+            activeforeground=COLORS["fg"],
+            command=run_all_functions,
+            relief=tk.FLAT,
+            borderwidth=0,
+            padx=20,
+            pady=8,
+            cursor="hand2"
+        )
+        all_btn.pack(anchor=tk.E, padx=35, pady=(10, 0))
+        
         # Help text
         help_frame = tk.Frame(main_container, bg=COLORS["bg_dark"], pady=15)
         help_frame.pack(fill=tk.X)
         
         tk.Label(
             help_frame,
-            text="Select a file and function to start processing.",
+            text="Select a file and function to queue a job; queued jobs run in the background.",
             font=("Segoe UI", 10, "italic"),
             fg=COLORS["fg_dim"],
             bg=COLORS["bg_dark"]
@@ -655,9 +1261,104 @@ class BigDataGUI:
         exit_btn.bind("<Enter>", on_enter)
         exit_btn.bind("<Leave>", on_leave)
         
+    def create_queue_tab(self):
+        """Create the job queue tab."""
+        global queue_table
+        
+        queue_frame = ttk.Frame(notebook, style="TFrame")
+        notebook.add(queue_frame, text="  Job Queue  ")
+        
+        # Container with padding
+        container = tk.Frame(queue_frame, bg=COLORS["bg_dark"], padx=20, pady=20)
+        container.pack(fill=tk.BOTH, expand=True)
+        
+        # Header with queue actions
+        header_frame = tk.Frame(container, bg=COLORS["bg_dark"])
+        header_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        tk.Label(
+            header_frame,
+            text="Job Queue",
+            font=("Segoe UI", 16, "bold"),
+            fg=COLORS["fg"],
+            bg=COLORS["bg_dark"]
+        ).pack(side=tk.LEFT)
+        
+        for text, command in (("Clear Finished", clear_finished_jobs),
+                              ("Cancel All", lambda: job_queue.cancel_all()),
+                              ("Cancel Selected", cancel_selected_jobs)):
+            btn = tk.Button(
+                header_frame,
+                text=text,
+                font=("Segoe UI", 10),
+                bg=COLORS["bg_medium"],
+                fg=COLORS["fg"],
+                activebackground=COLORS["accent_secondary"],
+                activeforeground=COLORS["fg"],
+                command=command,
+                relief=tk.FLAT,
+                borderwidth=0,
+                padx=15,
+                pady=6,
+                cursor="hand2"
+            )
+            btn.pack(side=tk.RIGHT, padx=(10, 0))
+            btn.bind("<Enter>", on_enter)
+            btn.bind("<Leave>", on_leave)
+        
+        # Table with scrollbar
+        table_frame = tk.Frame(
+            container,
+            bg=COLORS["bg_medium"],
+            highlightbackground=COLORS["border"],
+            highlightthickness=1
+        )
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(table_frame, style="TScrollbar")
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        queue_table = ttk.Treeview(
+            table_frame,
+            columns=("ID", "Function", "Dataset", "Backend", "Status", "Progress", "Rate", "ETA", "Runtime"),
+            show="headings",
+            style="Treeview",
+            yscrollcommand=scrollbar.set
+        )
+        queue_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.config(command=queue_table.yview)
+        
+        queue_table.heading("ID", text="#")
+        queue_table.heading("Function", text="Function")
+        queue_table.heading("Dataset", text="Dataset")
+        queue_table.heading("Backend", text="Backend")
+        queue_table.heading("Status", text="Status")
+        queue_table.heading("Progress", text="Progress")
+        queue_table.heading("Rate", text="Records/s")
+        queue_table.heading("ETA", text="ETA")
+        queue_table.heading("Runtime", text="Runtime (s)")
+        
+        queue_table.column("ID", width=50)
+        queue_table.column("Function", width=200)
+        queue_table.column("Dataset", width=200)
+        queue_table.column("Backend", width=80)
+        queue_table.column("Status", width=220)
+        queue_table.column("Progress", width=80)
+        queue_table.column("Rate", width=100)
+        queue_table.column("ETA", width=70)
+        queue_table.column("Runtime", width=90)
+        
+        # Status colors
+        queue_table.tag_configure("running", foreground=COLORS["accent_warning"])
+        queue_table.tag_configure("staging", foreground=COLORS["accent_secondary"])
+        queue_table.tag_configure("done", foreground=COLORS["accent_success"])
+        queue_table.tag_configure("cached", foreground=COLORS["accent_success"])
+        queue_table.tag_configure("failed", foreground=COLORS["accent_error"])
+        queue_table.tag_configure("cancelled", foreground=COLORS["fg_dim"])
+        
     def create_output_tab(self):
         """Create the job output tab."""
-        global output_text
+        global output_text, output_lines_var
         
         output_frame = ttk.Frame(notebook, style="TFrame")
         notebook.add(output_frame, text="  Job Output  ")
@@ -666,14 +1367,42 @@ class BigDataGUI:
         container = tk.Frame(output_frame, bg=COLORS["bg_dark"], padx=20, pady=20)
         container.pack(fill=tk.BOTH, expand=True)
         
-        # Header
+        # Header with the console line limit
+        header_frame = tk.Frame(container, bg=COLORS["bg_dark"])
+        header_frame.pack(fill=tk.X, pady=(0, 10))
+        
         tk.Label(
-            container,
+            header_frame,
             text="Hadoop Job Output",
             font=("Segoe UI", 16, "bold"),
             fg=COLORS["fg"],
             bg=COLORS["bg_dark"]
-        ).pack(anchor=tk.W, pady=(0, 10))
+        ).pack(side=tk.LEFT)
+        
+        output_lines_var = tk.StringVar(value=str(DEFAULT_OUTPUT_LINES))
+        
+        tk.Spinbox(
+            header_frame,
+            from_=100,
+            to=1000000,
+            increment=1000,
+            textvariable=output_lines_var,
+            width=8,
+            font=("Segoe UI", 10),
+            bg=COLORS["bg_dark"],
+            fg=COLORS["fg"],
+            buttonbackground=COLORS["bg_light"],
+            insertbackground=COLORS["fg"],
+            relief=tk.FLAT
+        ).pack(side=tk.RIGHT)
+        
+        tk.Label(
+            header_frame,
+            text=f"Lines kept (full logs in {LOG_DIR}):",
+            font=("Segoe UI", 10),
+            fg=COLORS["fg_dim"],
+            bg=COLORS["bg_dark"]
+        ).pack(side=tk.RIGHT, padx=(0, 10))
         
         # Output console with custom styling
         console_frame = tk.Frame(
@@ -703,7 +1432,7 @@ class BigDataGUI:
         
     def create_results_tab(self):
         """Create the results tab with table and chart."""
-        global result_table, chart_frame
+        global result_table, chart_frame, runtime_chart, history_filter_vars, history_filter_dropdowns, period_var
         
         results_frame = ttk.Frame(notebook, style="TFrame")
         notebook.add(results_frame, text="  Results & Analytics  ")
@@ -729,6 +1458,57 @@ class BigDataGUI:
             bg=COLORS["bg_dark"]
         ).pack(anchor=tk.W, pady=(0, 10))
         
+        # History filters
+        filter_frame = tk.Frame(table_container, bg=COLORS["bg_dark"])
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        history_filter_vars = {}
+        history_filter_dropdowns = {}
+        for column in ("function", "dataset", "backend"):
+            tk.Label(
+                filter_frame,
+                text=f"{column.capitalize()}:",
+                font=("Segoe UI", 10),
+                fg=COLORS["fg"],
+                bg=COLORS["bg_dark"]
+            ).pack(side=tk.LEFT, padx=(0, 5))
+            
+            var = tk.StringVar(value=ALL_FILTER)
+            dropdown = ttk.Combobox(
+                filter_frame,
+                textvariable=var,
+                values=[ALL_FILTER],
+                font=("Segoe UI", 10),
+                style="TCombobox",
+                state="readonly",
+                width=24 if column == "dataset" else 12
+            )
+            dropdown.pack(side=tk.LEFT, padx=(0, 15))
+            dropdown.bind("<<ComboboxSelected>>", lambda e: update_performance_chart())
+            history_filter_vars[column] = var
+            history_filter_dropdowns[column] = dropdown
+        
+        tk.Label(
+            filter_frame,
+            text="Period:",
+            font=("Segoe UI", 10),
+            fg=COLORS["fg"],
+            bg=COLORS["bg_dark"]
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        period_var = tk.StringVar(value="This session")
+        period_dropdown = ttk.Combobox(
+            filter_frame,
+            textvariable=period_var,
+            values=list(PERIODS),
+            font=("Segoe UI", 10),
+            style="TCombobox",
+            state="readonly",
+            width=14
+        )
+        period_dropdown.pack(side=tk.LEFT)
+        period_dropdown.bind("<<ComboboxSelected>>", lambda e: update_performance_chart())
+        
         # Table with scrollbar
         table_frame = tk.Frame(
             table_container,
@@ -745,7 +1525,7 @@ class BigDataGUI:
         # Create results table
         result_table = ttk.Treeview(
             table_frame,
-            columns=("Function", "Value", "Runtime", "Dataset"),
+            columns=("Time", "Function", "Value", "Runtime", "Dataset", "Backend", "Source"),
             show="headings",
             style="Treeview",
             yscrollcommand=scrollbar.set
@@ -754,16 +1534,22 @@ class BigDataGUI:
         scrollbar.config(command=result_table.yview)
         
         # Configure columns
+        result_table.heading("Time", text="Time")
         result_table.heading("Function", text="Function")
         result_table.heading("Value", text="Output Value")
         result_table.heading("Runtime", text="Runtime (s)")
         result_table.heading("Dataset", text="Dataset")
+        result_table.heading("Backend", text="Backend")
+        result_table.heading("Source", text="Source")
         
         # Set column widths as proportions
-        result_table.column("Function", width=200)
-        result_table.column("Value", width=200)
-        result_table.column("Runtime", width=100)
+        result_table.column("Time", width=150)
+        result_table.column("Function", width=110)
+        result_table.column("Value", width=250)
+        result_table.column("Runtime", width=90)
         result_table.column("Dataset", width=200)
+        result_table.column("Backend", width=80)
+        result_table.column("Source", width=80)
         
         # Performance analytics section
         chart_container = tk.Frame(paned_window, bg=COLORS["bg_dark"])
@@ -787,9 +1573,14 @@ class BigDataGUI:
         )
         chart_frame.pack(fill=tk.BOTH, expand=True)
         
+        runtime_chart = RuntimeChart(chart_frame)
+        
+        # Show the stored history for the default filters
+        self.root.after_idle(update_performance_chart)
+        
     def create_status_bar(self):
         """Create a status bar at the bottom of the window."""
-        global status_frame, status_var
+        global status_frame, status_var, progress_var
         
         status_frame = tk.Frame(
             self.root,
@@ -810,7 +1601,19 @@ class BigDataGUI:
             padx=20,
             pady=4
         )
-        status_label.pack(fill=tk.X)
+        status_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Overall progress of the running jobs
+        progress_var = tk.DoubleVar(value=0)
+        
+        ttk.Progressbar(
+            status_frame,
+            variable=progress_var,
+            maximum=100,
+            length=220,
+            mode="determinate",
+            style="Status.Horizontal.TProgressbar"
+        ).pack(side=tk.RIGHT, padx=20)
 
 # === Main Application ===
 if __name__ == "__main__":
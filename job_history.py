@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""SQLite history of every job run: results and performance metrics.
+
+One row per run, keyed by run_id. Several writers fill in the same row:
+report_performance (the reducer and local runner monitor) stores the
+resource metrics, and the GUI and test_performance.py add what only they
+know (backend, cache source, wall time, result lines). Indexes on function,
+dataset, backend and timestamp keep filtered queries over months of runs
+fast. Each thread keeps one connection per database, and the schema is
+set up once per process.
+
+    python job_history.py list --function median --since 2025-05-01
+    python job_history.py compare --dataset retail_prices.txt
+    python job_history.py import performance_logs
+"""
+import os
+import sys
+import glob
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+HISTORY_DB = os.path.join('performance_logs', 'job_history.sqlite3')
+
+COLUMNS = ('run_id', 'timestamp', 'function', 'dataset', 'backend', 'source', 'runtime_seconds',
+           'wall_seconds', 'records_processed', 'throughput', 'max_cpu_usage', 'max_memory_mb',
+           'result', 'metrics')
+FILTERS = ('function', 'dataset', 'backend', 'source')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    function TEXT,
+    dataset TEXT,
+    backend TEXT,
+    source TEXT,
+    runtime_seconds REAL,
+    wall_seconds REAL,
+    records_processed INTEGER,
+    throughput REAL,
+    max_cpu_usage REAL,
+    max_memory_mb REAL,
+    result TEXT,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_function ON runs (function, timestamp);
+CREATE INDEX IF NOT EXISTS runs_dataset ON runs (dataset, timestamp);
+CREATE INDEX IF NOT EXISTS runs_backend ON runs (backend, timestamp);
+-- Covering indexes for the runtime comparison, so it never reads the table itself:
+-- grouped scans over all runs, and time windows such as the GUI's default "This session"
+DROP INDEX IF EXISTS runs_runtime;
+DROP INDEX IF EXISTS runs_timestamp;
+CREATE INDEX IF NOT EXISTS runs_compare ON runs (function, backend, source, dataset, timestamp,
+                                                 runtime_seconds, wall_seconds, throughput);
+CREATE INDEX IF NOT EXISTS runs_recent ON runs (timestamp, function, backend, source, dataset,
+                                                runtime_seconds, wall_seconds, throughput);
+"""
+
+# One connection per thread and database; sqlite3 connections stay on the thread that made them
+_connections = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+def connect(path: str = HISTORY_DB) -> sqlite3.Connection:
+    """Open a new connection, creating the database and its schema if needed"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # Readers (the GUI) never block the jobs writing their rows
+    conn.execute('PRAGMA journal_mode=WAL')
+    with _schema_lock:
+        if os.path.abspath(path) not in _schema_ready:
+            conn.executescript(SCHEMA)
+            _schema_ready.add(os.path.abspath(path))
+    return conn
+
+def _connection(path: str) -> sqlite3.Connection:
+    """This thread's connection to a database, opened on first use and then reused"""
+    cache = getattr(_connections, 'by_path', None)
+    if cache is None:
+        cache = _connections.by_path = {}
+    conn = cache.get(path)
+    if conn is None:
+        conn = cache[path] = connect(path)
+    return conn
+
+def now() -> str:
+    """Timestamp format of the store; sorts chronologically as text"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def record_run(run_id: str, path: str = HISTORY_DB, **fields) -> None:
+    """Insert a run or fill in more of its row; None fields leave stored values alone"""
+    unknown = set(fields) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown history columns: {', '.join(sorted(unknown))}")
+    fields = {name: value for name, value in fields.items() if value is not None}
+    if isinstance(fields.get('metrics'), dict):
+        fields['metrics'] = json.dumps(fields['metrics'])
+    fields.setdefault('timestamp', now())
+
+    names = ['run_id'] + list(fields)
+    # The first writer's timestamp is the run's timestamp
+    updates = ', '.join(f"{name} = excluded.{name}" for name in fields if name != 'timestamp')
+    sql = (f"INSERT INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+           f"ON CONFLICT(run_id) DO {'UPDATE SET ' + updates if updates else 'NOTHING'}")
+    conn = _connection(path)
+    with conn:
+        conn.execute(sql, [run_id] + list(fields.values()))
+
+def metrics_fields(record: Dict) -> Dict:
+    """History columns of a performance_monitor metrics record"""
+    return {
+        'function': record.get('function'),
+        'dataset': record.get('input_file'),
+        'runtime_seconds': record.get('runtime_seconds'),
+        'records_processed': record.get('records_processed'),
+        'throughput': record.get('throughput'),
+        'max_cpu_usage': record.get('max_cpu_usage'),
+        'max_memory_mb': record.get('max_memory_mb'),
+        'metrics': record
+    }
+
+def record_metrics(record: Dict, path: str = HISTORY_DB, **fields) -> None:
+    """Store a metrics record under its run_id, plus any extra columns"""
+    record_run(record['run_id'], path, **dict(metrics_fields(record), **fields))
+
+def _where(since: Optional[str], until: Optional[str], filters: Dict):
+    clauses, params = [], []
+    for name, value in filters.items():
+        if name not in FILTERS:
+            raise ValueError(f"Cannot filter on {name}")
+        if value is not None:
+            clauses.append(f"{name} = ?")
+            params.append(value)
+    if since:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def query_runs(path: str = HISTORY_DB, since: Optional[str] = None, until: Optional[str] = None,
+               limit: Optional[int] = None, **filters) -> List[Dict]:
+    """Runs matching the filters, newest first"""
+    where, params = _where(since, until, filters)
+    sql = f"SELECT {', '.join(c for c in COLUMNS if c != 'metrics')} FROM runs{where} ORDER BY timestamp DESC"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [dict(row) for row in _connection(path).execute(sql, params)]
+
+def compare_runs(path: str = HISTORY_DB, since: Optional[str] = None, until: Optional[str] = None,
+                 **filters) -> List[Dict]:
+    """Runtime count/mean/min/max per function and backend; cache hits excluded"""
+    where, params = _where(since, until, filters)
+    where += (" AND " if where else " WHERE ") + "COALESCE(source, '') != 'cache'"
+    runtime = "COALESCE(runtime_seconds, wall_seconds)"
+    # The planner prefers runs_compare for its group order, but scanning a window of runs_recent
+    # is far cheaper: 0.1 ms instead of 30 ms for a session in 200k runs
+    table = "runs INDEXED BY runs_recent" if since else "runs"
+    sql = (f"SELECT function, backend, COUNT(*) AS runs, AVG({runtime}) AS mean, MIN({runtime}) AS min, "
+           f"MAX({runtime}) AS max, AVG(throughput) AS throughput FROM {table}{where} "
+           f"GROUP BY function, backend ORDER BY function, backend")
+    return [dict(row) for row in _connection(path).execute(sql, params)]
+
+def distinct_values(column: str, path: str = HISTORY_DB) -> List[str]:
+    """Values of a filter column seen so far, for filter dropdowns"""
+    if column not in FILTERS:
+        raise ValueError(f"Cannot filter on {column}")
+    return [row[0] for row in _connection(path).execute(
+        f"SELECT DISTINCT {column} FROM runs WHERE {column} IS NOT NULL ORDER BY {column}")]
+
+def import_logs(directory: str = 'performance_logs', path: str = HISTORY_DB) -> int:
+    """Load runs/*.jsonl metrics records and complete_performance_metrics_*.json sweeps; returns rows written"""
+    count = 0
+    for jsonl in sorted(glob.glob(os.path.join(directory, 'runs', '*.jsonl'))):
+        with open(jsonl, 'r') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if record.get('run_id'):
+                        start = record.get('start_time')
+                        timestamp = datetime.fromtimestamp(start).strftime('%Y-%m-%d %H:%M:%S') if start else None
+                        record_metrics(record, path, timestamp=timestamp)
+                        count += 1
+
+    for sweep_file in sorted(glob.glob(os.path.join(directory, 'complete_performance_metrics_*.json'))):
+        with open(sweep_file, 'r') as f:
+            sweep = json.load(f)
+        stem = os.path.splitext(os.path.basename(sweep_file))[0]
+        backend = sweep.get('backend', 'pipeline')
+        for i, run in enumerate(sweep.get('functions', [])):
+            metrics = dict(run.get('metrics', {}), function=run['function'], input_file=run.get('input_file'))
+            # Older sweeps predate run ids
+            run_id = run.get('run_id') or f"{stem}-{i}"
+            record_run(run_id, path, **dict(metrics_fields(metrics), timestamp=run.get('timestamp'),
+                                            backend=run.get('backend', backend),
+                                            source='cache' if run.get('cached') else run.get('backend', backend),
+                                            wall_seconds=run.get('wall_seconds'), result=run.get('result')))
+            count += 1
+    return count
+
+def _print_table(rows: List[Dict], columns: List[str]) -> None:
+    def cell(value):
+        return f"{value:.4g}" if isinstance(value, float) else ("" if value is None else str(value).replace('\n', ' | ').replace('\t', ' '))
+    cells = [[cell(row[c]) for c in columns] for row in rows]
+    widths = [max([len(c)] + [len(r[i]) for r in cells]) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the job history database")
+    parser.add_argument('--db', default=HISTORY_DB)
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('list', "runs matching the filters, newest first"),
+                            ('compare', "runtime per function and backend")):
+        command = commands.add_parser(name, help=help_text)
+        for column in FILTERS:
+            command.add_argument(f'--{column}')
+        command.add_argument('--since', help="YYYY-MM-DD[ HH:MM:SS]")
+        command.add_argument('--until', help="YYYY-MM-DD[ HH:MM:SS]")
+        if name == 'list':
+            command.add_argument('--limit', type=int, default=50)
+    load = commands.add_parser('import', help="load existing performance_logs files into the database")
+    load.add_argument('directory', nargs='?', default='performance_logs')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        print(f"Imported {import_logs(args.directory, args.db)} runs into {args.db}", file=sys.stderr)
+        return
+    filters = {column: getattr(args, column) for column in FILTERS}
+    if args.command == 'list':
+        rows = query_runs(args.db, args.since, args.until, args.limit, **filters)
+        _print_table(rows, ['timestamp', 'function', 'dataset', 'backend', 'source', 'runtime_seconds',
+                            'wall_seconds', 'throughput', 'max_memory_mb', 'result'])
+    else:
+        _print_table(compare_runs(args.db, args.since, args.until, **filters),
+                     ['function', 'backend', 'runs', 'mean', 'min', 'max', 'throughput'])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Hadoop streaming progress reporting, and parsing it back for the GUI.
+
+A streaming task reports to the framework by writing
+
+    reporter:counter:<group>,<counter>,<amount>
+    reporter:status:<message>
+
+lines to stderr. stats_reducer.py writes them under Hadoop (they also keep a
+long reduce from hitting the task timeout), and local_runner.py --progress
+writes the same lines for local runs. JobProgress turns a job's output,
+including the Hadoop client's "map x% reduce y%" lines and its final counter
+dump, into a completed fraction, a records/s rate and an ETA.
+"""
+import re
+import sys
+import time
+
+COUNTER_GROUP = 'StatsJob'
+RECORDS_COUNTER = 'RecordsParsed'
+BYTES_COUNTER = 'BytesRead'
+# Bytes the job will read in total; only known to local runs
+TOTAL_BYTES_COUNTER = 'BytesTotal'
+# Seconds between counter updates; the framework only needs an occasional increment
+REPORT_INTERVAL = 1.0
+
+_COUNTER_LINE = re.compile(r'reporter:counter:([^,]*),([^,]*),(-?\d+)')
+_STATUS_LINE = re.compile(r'reporter:status:(.*)')
+_HADOOP_PROGRESS = re.compile(r'\bmap (\d+)% reduce (\d+)%')
+_HADOOP_JOB_ID = re.compile(r'Running job: (job_\w+)')
+# Final counter dump of the Hadoop client, e.g. "\t\tRecordsParsed=12345"
+_COUNTER_TOTAL = re.compile(rf'^\s*({RECORDS_COUNTER}|{BYTES_COUNTER})=(\d+)\s*$')
+
+class Reporter:
+    """Writes reporter lines, batching counter increments to one update per interval"""
+    def __init__(self, records=None, stream=None, interval=REPORT_INTERVAL):
+        # Optional callable returning the records processed so far; only called when reporting
+        self.records = records
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.reported_records = 0
+        self.unreported_records = 0
+        self.unreported_bytes = 0
+        self.next_report = time.monotonic() + interval
+
+    def status(self, message: str) -> None:
+        self.stream.write(f"reporter:status:{message}\n")
+        self.stream.flush()
+
+    def counter(self, name: str, amount: int) -> None:
+        if amount:
+            self.stream.write(f"reporter:counter:{COUNTER_GROUP},{name},{amount}\n")
+
+    def add(self, nbytes: int = 0, records: int = 0) -> None:
+        self.unreported_bytes += nbytes
+        self.unreported_records += records
+        if time.monotonic() >= self.next_report:
+            self.flush()
+
+    def flush(self) -> None:
+        records = self.unreported_records
+        if self.records is not None:
+            total = self.records()
+            records += total - self.reported_records
+            self.reported_records = total
+        self.counter(BYTES_COUNTER, self.unreported_bytes)
+        self.counter(RECORDS_COUNTER, records)
+        self.unreported_bytes = self.unreported_records = 0
+        self.stream.flush()
+        self.next_report = time.monotonic() + self.interval
+
+class NullReporter:
+    """Reporter that writes nothing"""
+    def status(self, message: str) -> None:
+        pass
+
+    def counter(self, name: str, amount: int) -> None:
+        pass
+
+    def add(self, nbytes: int = 0, records: int = 0) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+class JobProgress:
+    """Progress of one running job, updated from the lines its command prints"""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.records = 0
+        self.bytes_read = 0
+        self.total_bytes = 0
+        self.map_percent = None
+        self.reduce_percent = None
+        self.phase = ''
+        self.hadoop_job_id = None
+
+    def feed(self, line: str) -> bool:
+        """Update from one output line; True if it was a reporter line rather than output for the user"""
+        match = _COUNTER_LINE.search(line)
+        if match:
+            group, name, amount = match.groups()
+            if group == COUNTER_GROUP:
+                self._count(name, int(amount))
+            return True
+        match = _STATUS_LINE.search(line)
+        if match:
+            self.phase = match.group(1).strip()
+            return True
+        match = _HADOOP_PROGRESS.search(line)
+        if match:
+            self.map_percent, self.reduce_percent = int(match.group(1)), int(match.group(2))
+            return False
+        match = _HADOOP_JOB_ID.search(line)
+        if match:
+            self.hadoop_job_id = match.group(1)
+            return False
+        match = _COUNTER_TOTAL.match(line)
+        if match:
+            self.set_total(match.group(1), int(match.group(2)))
+        return False
+
+    def _count(self, name: str, amount: int) -> None:
+        if name == RECORDS_COUNTER:
+            self.records += amount
+        elif name == BYTES_COUNTER:
+            self.bytes_read += amount
+        elif name == TOTAL_BYTES_COUNTER:
+            self.total_bytes += amount
+
+    def set_total(self, name: str, value: int) -> None:
+        """Replace a counter with its job-wide total (from the client's counter dump or a poll)"""
+        if name == RECORDS_COUNTER:
+            self.records = value
+        elif name == BYTES_COUNTER:
+            self.bytes_read = value
+
+    def fraction(self):
+        """Completed fraction in [0, 1], or None while unknown"""
+        if self.map_percent is not None:
+            # Map and reduce weighted equally, as in the Hadoop client's own estimate
+            return (self.map_percent + self.reduce_percent) / 200
+        if self.total_bytes:
+            return min(1.0, self.bytes_read / self.total_bytes)
+        return None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def records_per_second(self) -> float:
+        elapsed = self.elapsed()
+        return self.records / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self):
+        """Seconds left at the average rate so far, or None before any progress"""
+        fraction = self.fraction()
+        if not fraction or fraction >= 1.0:
+            return None
+        return self.elapsed() * (1.0 - fraction) / fraction
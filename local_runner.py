@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Single-node replacement for the Hadoop streaming pipeline.
+
+Splits an input file into newline-aligned byte ranges (or index ranges of
+its cached binary column, see column_cache.py), runs the map and
+partial-aggregate phase for each range in a process pool, and merges the
+partial StatsAccumulator states with the same logic stats_reducer.py uses.
+Prints the same result lines and performance block as the reducer.
+
+With --normalize DIR it runs two-phase min-max normalization: the merged
+minmax partials give the global range, then a map-only pass over the same
+ranges writes the scaled values to DIR/part-NNNNN, one file per worker range.
+
+With --progress it writes Hadoop streaming reporter:counter/status lines to
+stderr as ranges complete, which the GUI turns into a progress bar.
+"""
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from stats_core import StatsAccumulator, FUNCTIONS, normalize, load_numpy
+from column_cache import ensure_column, open_column
+from checkpoints import load_checkpoint, save_checkpoint
+from job_progress import Reporter, NullReporter, TOTAL_BYTES_COUNTER
+
+# Below this size the pool's startup cost outweighs the parallel speedup
+MIN_PARALLEL_BYTES = 1024 * 1024
+# Ranges per worker on large inputs: evens out uneven ranges and gives finer progress
+RANGES_PER_WORKER = 4
+# Bytes (text) or values (column) normalized per batch; bounds worker memory
+NORMALIZE_BATCH_BYTES = 1024 * 1024
+NORMALIZE_BATCH_VALUES = 1 << 17
+
+def split_ranges(path: str, chunks: int, start: int = 0, end: int = None) -> list:
+    """Split bytes [start, end) of a file into ranges that begin and end on line boundaries"""
+    end = os.path.getsize(path) if end is None else end
+    length = end - start
+    boundaries = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, chunks):
+            f.seek(max(start + length * i // chunks - 1, boundaries[-1]))
+            f.readline()
+            boundaries.append(min(f.tell(), end))
+    boundaries.append(end)
+    return [(lo, hi) for lo, hi in zip(boundaries, boundaries[1:]) if hi > lo]
+
+def complete_lines_end(path: str, start: int, end: int) -> int:
+    """Offset just past the last newline in bytes [start, end), or start if there is none"""
+    block = 64 * 1024
+    with open(path, 'rb') as f:
+        pos = end
+        while pos > start:
+            lo = max(start, pos - block)
+            f.seek(lo)
+            newline = f.read(pos - lo).rfind(b'\n')
+            if newline >= 0:
+                return lo + newline + 1
+            pos = lo
+    return start
+
+def map_range(path: str, start: int, end: int, func: str, approx: bool) -> StatsAccumulator:
+    """Map phase for one byte range: parse its values into a partial accumulator"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return StatsAccumulator(func, approx=approx).add_values(map(float, data.split()))
+
+def map_column_range(column_file: str, start: int, end: int, func: str, approx: bool) -> StatsAccumulator:
+    """Map phase for one slice of a cached float64 column; no text parsing at all"""
+    column = open_column(column_file)
+    return StatsAccumulator(func, approx=approx).add_values(column[start:end])
+
+def run_local(func: str, path: str, approx: bool = False, workers: int = None,
+              use_cache: bool = True, reporter=None) -> StatsAccumulator:
+    """Run the job on all cores and return the merged accumulator"""
+    workers = workers or os.cpu_count() or 1
+    large = os.path.getsize(path) >= MIN_PARALLEL_BYTES
+    parallel = workers > 1 and large
+    chunks = workers * RANGES_PER_WORKER if large else 1
+
+    if use_cache:
+        # Parse the text once; later runs map the binary column straight into memory
+        source = ensure_column(path)
+        count = os.path.getsize(source) // 8
+        task = map_column_range
+        ranges = [(count * i // chunks, count * (i + 1) // chunks) for i in range(chunks)]
+        unit = 8
+    else:
+        source = path
+        task = map_range
+        ranges = split_ranges(path, chunks)
+        unit = 1
+
+    return run_ranges(task, source, ranges, func, approx, workers if parallel else 1, reporter, unit)
+
+def run_ranges(task, source: str, ranges: list, func: str, approx: bool, workers: int,
+               reporter=None, unit: int = 1) -> StatsAccumulator:
+    """Map every range (in a process pool when workers > 1) and merge the partials.
+
+    unit is the size in bytes of one range position (8 for column indexes), for progress reporting.
+    """
+    reporter = reporter or NullReporter()
+    reporter.counter(TOTAL_BYTES_COUNTER, sum(end - start for start, end in ranges) * unit)
+    reporter.status(f"{func}: mapping {len(ranges)} ranges")
+    result = StatsAccumulator(func, approx=approx)
+    if workers == 1:
+        for start, end in ranges:
+            partial = task(source, start, end, func, approx)
+            result.merge(partial)
+            reporter.add((end - start) * unit, partial.n)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(task, source, start, end, func, approx) for start, end in ranges]
+            for (start, end), future in zip(ranges, futures):
+                partial = future.result()
+                result.merge(partial)
+                reporter.add((end - start) * unit, partial.n)
+    reporter.flush()
+    return result
+
+def _write_scaled(out, scaled) -> int:
+    if len(scaled):
+        out.write('\n'.join(map(repr, scaled)) + '\n')
+    return len(scaled)
+
+def normalize_range(path: str, start: int, end: int, lo: float, hi: float, part_file: str) -> int:
+    """Map-only phase two for one byte range: stream scaled values to part_file in batches"""
+    written = 0
+    with open(path, 'rb') as f, open(part_file, 'w') as out:
+        f.seek(start)
+        leftover = b''
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(NORMALIZE_BATCH_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            chunk = leftover + chunk
+            # Ranges end on line boundaries, so only the last batch can end mid-number
+            cut = chunk.rfind(b'\n') + 1 if remaining > 0 else len(chunk)
+            leftover = chunk[cut:]
+            written += _write_scaled(out, normalize([float(x) for x in chunk[:cut].split()], lo, hi))
+    return written
+
+def normalize_column_range(column_file: str, start: int, end: int, lo: float, hi: float, part_file: str) -> int:
+    """Map-only phase two for one slice of a cached float64 column"""
+    column = open_column(column_file)
+    np = load_numpy()
+    written = 0
+    with open(part_file, 'w') as out:
+        for batch_start in range(start, end, NORMALIZE_BATCH_VALUES):
+            batch = column[batch_start:min(end, batch_start + NORMALIZE_BATCH_VALUES)]
+            values = np.frombuffer(batch, dtype=np.float64) if np else batch.tolist()
+            scaled = normalize(values, lo, hi)
+            written += _write_scaled(out, scaled.tolist() if np else scaled)
+    return written
+
+def run_normalize(path: str, output_dir: str, workers: int = None, use_cache: bool = True, reporter=None):
+    """Two-phase min-max normalization; returns (minmax accumulator, values written)"""
+    workers = workers or os.cpu_count() or 1
+    reporter = reporter or NullReporter()
+    # Phase one: global min and max from mergeable partials
+    accumulator = run_local('minmax', path, workers=workers, use_cache=use_cache, reporter=reporter)
+    lo, hi = accumulator.moments.min, accumulator.moments.max
+    reporter.status(f"minmax: writing normalized values to {output_dir}")
+
+    # Phase two: map-only, every range streams its own part file
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, 'part-*')):
+        os.remove(stale)
+    parallel = workers > 1 and os.path.getsize(path) >= MIN_PARALLEL_BYTES
+    if use_cache:
+        source = ensure_column(path)
+        count = os.path.getsize(source) // 8
+        task = normalize_column_range
+        ranges = [(count * i // workers, count * (i + 1) // workers) for i in range(workers)] if parallel else [(0, count)]
+        unit = 8
+    else:
+        source = path
+        task = normalize_range
+        ranges = split_ranges(path, workers) if parallel else [(0, os.path.getsize(path))]
+        unit = 1
+    ranges = [(start, end) for start, end in ranges if end > start]
+    # Phase two reads the input again; without its own total, progress would show 100% while it runs
+    reporter.counter(TOTAL_BYTES_COUNTER, sum(end - start for start, end in ranges) * unit)
+
+    parts = [os.path.join(output_dir, f'part-{i:05d}') for i in range(len(ranges))]
+    written = 0
+    if parallel:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(task, source, start, end, lo, hi, part)
+                       for (start, end), part in zip(ranges, parts)]
+            for (start, end), future in zip(ranges, futures):
+                written += future.result()
+                reporter.add((end - start) * unit)
+    else:
+        for (start, end), part in zip(ranges, parts):
+            written += task(source, start, end, lo, hi, part)
+            reporter.add((end - start) * unit)
+    reporter.flush()
+    return accumulator, written
+
+def run_incremental(func: str, path: str, approx: bool = False, workers: int = None,
+                    reporter=None) -> StatsAccumulator:
+    """Merge the bytes appended since the last checkpoint into it, then save it again"""
+    workers = workers or os.cpu_count() or 1
+    offset, result = load_checkpoint(path, func, approx)
+    size = os.path.getsize(path)
+    # Only whole lines are checkpointed; an unterminated last line may still be growing
+    end = complete_lines_end(path, offset, size)
+    print(f"Checkpoint covers {offset} bytes; reading {size - offset} new bytes", file=sys.stderr)
+
+    if result is None:
+        result = StatsAccumulator(func, approx=approx)
+    if end > offset:
+        parallel = workers > 1 and end - offset >= MIN_PARALLEL_BYTES
+        ranges = split_ranges(path, workers, offset, end) if parallel else [(offset, end)]
+        result.merge(run_ranges(map_range, path, ranges, func, approx, workers if parallel else 1, reporter))
+        save_checkpoint(path, end, result)
+    if size > end:
+        result.merge(map_range(path, end, size, func, approx))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a statistics job locally without Hadoop")
+    parser.add_argument("function", help=", ".join(FUNCTIONS))
+    parser.add_argument("input_file")
+    parser.add_argument("--approx", action="store_true",
+                        help="estimate median/percentile from mergeable KLL sketches")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse the text file instead of the cached binary column")
+    parser.add_argument("--incremental", action="store_true",
+                        help="resume from the saved checkpoint and only read bytes appended since")
+    parser.add_argument("--normalize", metavar="OUTPUT_DIR", default=None,
+                        help="min-max normalize the input into OUTPUT_DIR/part-* (function must be minmax)")
+    parser.add_argument("--progress", action="store_true",
+                        help="write Hadoop-style reporter:counter/status progress lines to stderr")
+    parser.add_argument("--plot", action="store_true",
+                        help="render the performance plot now instead of with 'performance_monitor.py render'")
+    parser.add_argument("--run-id", default=None, help="id recorded with this run's metrics")
+    parser.add_argument("--input-name", default=None, help="input file name recorded with the metrics")
+    parser.add_argument("--metrics-out", default=None, help="append this run's metrics as a JSON line to this file")
+    parser.add_argument("--prom-out", default=None, help="write this run's metrics in Prometheus text format to this file")
+    parser.add_argument("--history", default=None, metavar="DB",
+                        help="also store this run's metrics in this SQLite job history (see job_history.py)")
+    args = parser.parse_args()
+    func = args.function.lower()
+
+    if func not in FUNCTIONS:
+        print(f"Unknown function: {func}", file=sys.stderr)
+        sys.exit(1)
+
+    # Try to import performance monitoring, but don't fail if it's not available
+    try:
+        from performance_monitor import PerformanceMonitor, report_performance
+        monitor = PerformanceMonitor()
+        monitor.start_monitoring()
+    except Exception:
+        monitor = None
+
+    reporter = Reporter() if args.progress else None
+    if args.normalize:
+        if func != "minmax":
+            print("--normalize only applies to the minmax function", file=sys.stderr)
+            sys.exit(1)
+        accumulator, written = run_normalize(args.input_file, args.normalize, workers=args.workers,
+                                             use_cache=not args.no_cache, reporter=reporter)
+        print(f"Normalized {written} values into {args.normalize}", file=sys.stderr)
+    elif args.incremental:
+        accumulator = run_incremental(func, args.input_file, approx=args.approx, workers=args.workers,
+                                      reporter=reporter)
+    else:
+        accumulator = run_local(func, args.input_file, approx=args.approx, workers=args.workers,
+                                use_cache=not args.no_cache, reporter=reporter)
+    for result in accumulator.results():
+        print(result)
+
+    if monitor is not None:
+        try:
+            report_performance(monitor, func, accumulator.n, plot=args.plot, run_id=args.run_id,
+                               input_file=args.input_name or os.path.basename(args.input_file),
+                               metrics_out=args.metrics_out, prom_out=args.prom_out,
+                               history=args.history)
+        except Exception as e:
+            print(f"Warning: Performance monitoring failed: {e}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,134 @@
 #!/usr/bin/env python3
 import sys
+import argparse
+import itertools
+from array import array
+from stats_core import WIRE_FORMATS
 
-for line in sys.stdin:
-    value = line.strip()
-    if value:
-        print(f"val\t{value}")
+# Output modes:
+#   values  - one "val\t<value>" line per input row (default)
+#   moments - a single mergeable "moments" record for the whole split
+#   counts  - "counts" records of value:count pairs (exact median/percentile
+#             on duplicate-heavy columns; cost scales with distinct values;
+#             moments for "all" equal the values path up to rounding).
+#             Past COUNTS_MAX_DISTINCT distinct values the rest of the split
+#             is passed on as raw values, so it never costs more than values
+#   sketch  - a single mergeable KLL quantile "sketch" record (for --approx)
+#   normalize - map-only phase two of min-max normalization: one scaled value
+#               per line, using the range from phase one (--range or --range-file).
+#               Run it with -D mapred.textoutputformat.separator= so the
+#               tab-less lines are written without a trailing tab
+parser = argparse.ArgumentParser(description="Hadoop streaming mapper for the statistics jobs")
+parser.add_argument("mode", nargs="?", default="values", help="values, moments, counts, sketch or normalize")
+parser.add_argument("--wire", choices=WIRE_FORMATS, default="text",
+                    help="typedbytes: binary records, raw values as packed float64 blocks")
+parser.add_argument("--range", default=None, help="normalize: MIN,MAX of the whole dataset")
+parser.add_argument("--range-file", default=None,
+                    help="normalize: output of 'stats_reducer.py minmax --emit-range' holding the range")
+args = parser.parse_args()
+mode = args.mode.lower()
+if args.wire == "typedbytes":
+    # Only typedbytes jobs ship typed_bytes.py to the task nodes
+    from typed_bytes import write_record, write_values
+
+# Bytes of input lines parsed into one packed block in typedbytes mode
+BLOCK_BYTES = 1024 * 1024
+# Lines per packed block when a counts mapper falls back to raw values
+BLOCK_LINES = 1 << 16
+# Distinct values per "counts" record, so high-cardinality splits never produce a giant line
+COUNTS_PER_RECORD = 10000
+# Distinct values a counts mapper aggregates before it falls back to raw values
+COUNTS_MAX_DISTINCT = 50000
+
+if mode == "values" and args.wire == "typedbytes":
+    out = sys.stdout.buffer
+    while True:
+        lines = sys.stdin.buffer.readlines(BLOCK_BYTES)
+        if not lines:
+            break
+        write_values(out, array('d', map(float, b''.join(lines).split())))
+
+elif mode == "values":
+    for line in sys.stdin:
+        value = line.strip()
+        if value:
+            print(f"val\t{value}")
+
+elif mode == "moments":
+    from stats_core import Moments
+
+    moments = Moments().extend(float(line) for line in sys.stdin if line.strip())
+    if moments.n:
+        if args.wire == "typedbytes":
+            write_record(sys.stdout.buffer, "moments", moments.to_payload())
+        else:
+            print(moments.to_record())
+
+elif mode == "counts":
+    from stats_core import counts_to_payload
+
+    counts = {}
+    lines = iter(sys.stdin)
+    for line in lines:
+        if line.strip():
+            x = float(line)
+            counts[x] = counts.get(x, 0) + 1
+            if len(counts) > COUNTS_MAX_DISTINCT:
+                break
+    items = list(counts.items())
+    for start in range(0, len(items), COUNTS_PER_RECORD):
+        payload = counts_to_payload(dict(items[start:start + COUNTS_PER_RECORD]))
+        if args.wire == "typedbytes":
+            write_record(sys.stdout.buffer, "counts", payload)
+        else:
+            print(f"counts\t{payload}")
+
+    # Mostly distinct values: aggregating the rest would only slow the reducer down
+    if args.wire == "typedbytes":
+        while True:
+            block = list(itertools.islice(lines, BLOCK_LINES))
+            if not block:
+                break
+            write_values(sys.stdout.buffer, array('d', map(float, ''.join(block).split())))
+    else:
+        for line in lines:
+            value = line.strip()
+            if value:
+                print(f"val\t{value}")
+
+elif mode == "normalize":
+    from stats_core import normalize, parse_range
+
+    if args.range_file:
+        with open(args.range_file, 'r') as f:
+            lo, hi = parse_range(f)
+    elif args.range:
+        lo, hi = (float(x) for x in args.range.split(','))
+    else:
+        print("normalize needs --range MIN,MAX or --range-file", file=sys.stderr)
+        sys.exit(1)
+    # Stream in batches so memory stays bounded regardless of split size
+    while True:
+        lines = sys.stdin.buffer.readlines(BLOCK_BYTES)
+        if not lines:
+            break
+        scaled = normalize([float(x) for x in b''.join(lines).split()], lo, hi)
+        if scaled:
+            sys.stdout.write('\n'.join(map(repr, scaled)) + '\n')
+
+elif mode == "sketch":
+    from quantile_sketch import KLLSketch
+
+    sketch = KLLSketch()
+    for line in sys.stdin:
+        if line.strip():
+            sketch.update(float(line))
+    if sketch.n:
+        if args.wire == "typedbytes":
+            write_record(sys.stdout.buffer, "sketch", sketch.to_payload())
+        else:
+            print(sketch.to_record())
+
+else:
+    print(f"Unknown mapper mode: {mode}", file=sys.stderr)
+    sys.exit(1)
@@ -1,16 +1,88 @@
 #!/usr/bin/env python3
+"""Performance monitoring for the statistics jobs.
+
+Importing this module is cheap: psutil is loaded when a monitor is created
+and matplotlib only when a plot is rendered. Jobs save raw metrics as JSON;
+plots are rendered on demand (--plot) or afterwards in one batch with
+
+    python performance_monitor.py render [metrics_*.json ...]
+
+For harnesses and dashboards, a job given --metrics-out appends one JSON
+Lines record per run (run id, function, input file, timings and summary)
+to that path, and --prom-out writes the same record in Prometheus text
+format, so nothing has to scrape stderr.
+"""
 import time
-import psutil  # type: ignore
 import os
+import sys
 import json
+import glob
+import uuid
+import socket
+import argparse
+import threading
+from array import array
 from datetime import datetime
-import matplotlib.pyplot as plt
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+psutil = None
+
+def _load_psutil():
+    """Import psutil on first use so importing this module stays cheap"""
+    global psutil
+    if psutil is None:
+        import psutil as module  # type: ignore
+        psutil = module
+    return psutil
+
+RUNS_DIR = os.path.join('performance_logs', 'runs')
+# Prefix of the gauges written to Prometheus text files
+PROMETHEUS_PREFIX = 'stats_job_'
+
+# Default seconds between background samples
+DEFAULT_SAMPLE_INTERVAL = 0.1
+# Samples kept per series; the oldest are overwritten on longer runs
+DEFAULT_SAMPLE_CAPACITY = 4096
+
+class _RingBuffer:
+    """Preallocated fixed-capacity series of floats; the oldest samples are overwritten"""
+
+    def __init__(self, capacity: int):
+        self._data = array('d', bytes(8 * capacity))
+        self._capacity = capacity
+        self._next = 0
+        self._count = 0
+
+    def append(self, value: float):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self._capacity
+        self._count = min(self._count + 1, self._capacity)
+
+    def values(self) -> List[float]:
+        if self._count < self._capacity:
+            return self._data[:self._count].tolist()
+        return (self._data[self._next:] + self._data[:self._next]).tolist()
+
+def _peak_rss_mb(process) -> float:
+    """Peak resident set size from the OS high-water mark, in MB"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    return process.memory_info().peak_wset / 1024 / 1024
 
 class PerformanceMonitor:
-    def __init__(self):
+    SERIES = ('timestamps', 'cpu_usage', 'memory_usage', 'io_read_mb', 'io_write_mb', 'ctx_switches')
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL, capacity: int = DEFAULT_SAMPLE_CAPACITY):
         self.start_time = None
         self.end_time = None
+        self.interval = interval
         self.metrics = {
             'runtime': 0,
             'cpu_usage': [],
@@ -18,6 +90,12 @@ class PerformanceMonitor:
             'timestamps': [],
             'records_processed': 0
         }
+        self._samples = {name: _RingBuffer(capacity) for name in self.SERIES}
+        self._sample_count = 0
+        self._last_counters = self._first_counters = (0.0, 0.0, 0)
+        self._process = _load_psutil().Process(os.getpid())
+        self._stop_event = threading.Event()
+        self._sampler = None
         
         # Create performance_logs directory if it doesn't exist
         if not os.path.exists('performance_logs'):
@@ -26,32 +104,68 @@ class PerformanceMonitor:
     def start_monitoring(self):
         """Start monitoring performance metrics"""
         self.start_time = time.time()
+        psutil.cpu_percent(interval=None)  # Prime the CPU counter
         self._update_metrics()  # Initial measurement
+        
+        # Sample in the background for the whole run
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='perf-sampler', daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop_event.wait(self.interval):
+            self._update_metrics()
 
     def _update_metrics(self):
-        """Update current performance metrics"""
+        """Record one sample of CPU, memory, I/O and context switches"""
         current_time = time.time()
         
         # CPU usage (percentage across all cores)
         cpu_percent = psutil.cpu_percent(interval=None)
         
         # Memory usage
-        memory = psutil.Process(os.getpid()).memory_info()
-        memory_usage = memory.rss / 1024 / 1024  # Convert to MB
+        memory_usage = self._process.memory_info().rss / 1024 / 1024  # Convert to MB
+        
+        # I/O counters are not available on every platform (e.g. macOS)
+        try:
+            io = self._process.io_counters()
+            io_read, io_write = io.read_bytes / 1024 / 1024, io.write_bytes / 1024 / 1024
+        except (AttributeError, psutil.Error):
+            io_read = io_write = 0.0
+        
+        switches = self._process.num_ctx_switches()
+        self._last_counters = (io_read, io_write, switches.voluntary + switches.involuntary)
+        if self._sample_count == 0:
+            self._first_counters = self._last_counters
         
         # Store metrics
-        self.metrics['cpu_usage'].append(cpu_percent)
-        self.metrics['memory_usage'].append(memory_usage)
-        self.metrics['timestamps'].append(current_time - self.start_time)
+        self._samples['timestamps'].append(current_time - self.start_time)
+        self._samples['cpu_usage'].append(cpu_percent)
+        self._samples['memory_usage'].append(memory_usage)
+        self._samples['io_read_mb'].append(io_read)
+        self._samples['io_write_mb'].append(io_write)
+        self._samples['ctx_switches'].append(self._last_counters[2])
+        self._sample_count += 1
 
     def stop_monitoring(self, records_processed: int = 0):
         """Stop monitoring and calculate final metrics"""
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
         self.end_time = time.time()
         self._update_metrics()  # Final measurement
         
+        for name in self.SERIES:
+            self.metrics[name] = self._samples[name].values()
         self.metrics['runtime'] = self.end_time - self.start_time
         self.metrics['records_processed'] = records_processed
         self.metrics['throughput'] = records_processed / self.metrics['runtime'] if self.metrics['runtime'] > 0 else 0
+        self.metrics['peak_rss_mb'] = _peak_rss_mb(self._process)
+        self.metrics['samples'] = self._sample_count
+        # Totals over the run; the ring buffer may have dropped the first samples
+        self.metrics['io_read_total_mb'] = self._last_counters[0] - self._first_counters[0]
+        self.metrics['io_write_total_mb'] = self._last_counters[1] - self._first_counters[1]
+        self.metrics['ctx_switches_total'] = self._last_counters[2] - self._first_counters[2]
         
         return self.get_summary()
 
@@ -64,47 +178,191 @@ class PerformanceMonitor:
             'avg_cpu_usage': sum(self.metrics['cpu_usage']) / len(self.metrics['cpu_usage']) if self.metrics['cpu_usage'] else 0,
             'max_cpu_usage': max(self.metrics['cpu_usage']) if self.metrics['cpu_usage'] else 0,
             'avg_memory_mb': sum(self.metrics['memory_usage']) / len(self.metrics['memory_usage']) if self.metrics['memory_usage'] else 0,
-            'max_memory_mb': max(self.metrics['memory_usage']) if self.metrics['memory_usage'] else 0
+            # The OS high-water mark also catches peaks between samples
+            'max_memory_mb': max(self.metrics['memory_usage'] + [self.metrics.get('peak_rss_mb', 0)]) if self.metrics['memory_usage'] else 0,
+            'io_read_mb': self.metrics.get('io_read_total_mb', 0),
+            'io_write_mb': self.metrics.get('io_write_total_mb', 0),
+            'ctx_switches': self.metrics.get('ctx_switches_total', 0),
+            'samples': self.metrics.get('samples', 0)
         }
 
     def create_performance_plot(self, function_name: str) -> str:
         """Generate performance visualization plot and return the file path"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Create subplots
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 8))
-        
-        # Plot CPU usage
-        ax1.plot(self.metrics['timestamps'], self.metrics['cpu_usage'], 'b-', label='CPU Usage (%)')
-        ax1.set_xlabel('Time (seconds)')
-        ax1.set_ylabel('CPU Usage (%)')
-        ax1.set_title(f'CPU Usage - {function_name}')
-        ax1.grid(True)
-        ax1.legend()
-        
-        # Plot Memory usage
-        ax2.plot(self.metrics['timestamps'], self.metrics['memory_usage'], 'r-', label='Memory Usage (MB)')
-        ax2.set_xlabel('Time (seconds)')
-        ax2.set_ylabel('Memory Usage (MB)')
-        ax2.set_title(f'Memory Usage - {function_name}')
-        ax2.grid(True)
-        ax2.legend()
-        
-        plt.tight_layout()
-        
-        # Save plot
-        plot_file = os.path.join('performance_logs', f'performance_plot_{function_name}_{timestamp}.png')
-        plt.savefig(plot_file)
-        plt.close()
-        
-        return plot_file
+        plot_file = os.path.join('performance_logs', f'performance_plot_{function_name}_{new_run_id()}.png')
+        return render_plot(self.metrics, function_name, plot_file)
 
-    def save_metrics(self, function_name: str) -> str:
+    def save_metrics(self, function_name: str, run_id: Optional[str] = None) -> str:
         """Save metrics to JSON file and return the file path"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        metrics_file = os.path.join('performance_logs', f'metrics_{function_name}_{timestamp}.json')
+        # A fresh run id when none is given: reducers finishing in the same second must not share a file
+        suffix = run_id or new_run_id()
+        metrics_file = os.path.join('performance_logs', f'metrics_{function_name}_{suffix}.json')
         
         with open(metrics_file, 'w') as f:
-            json.dump(self.metrics, f, indent=4)
+            json.dump(dict(self.metrics, function=function_name), f)
             
-        return metrics_file 
\ No newline at end of file
+        return metrics_file
+
+    def to_record(self, function_name: str, run_id: Optional[str] = None,
+                  input_file: Optional[str] = None) -> Dict:
+        """One self-describing metrics record for a finished run"""
+        record = {
+            'run_id': run_id,
+            'function': function_name,
+            'input_file': input_file,
+            'host': socket.gethostname(),
+            'pid': os.getpid(),
+            'start_time': self.start_time,
+            'end_time': self.end_time
+        }
+        record.update(self.get_summary())
+        return record
+
+def new_run_id() -> str:
+    """Sortable, collision-free id for one job run"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+def run_metrics_path(run_id: str) -> str:
+    """Default JSON Lines file for the metrics of one run"""
+    return os.path.join(RUNS_DIR, f'{run_id}.jsonl')
+
+def append_metrics_record(path: str, record: Dict) -> None:
+    """Append one record as a single JSON line; concurrent writers never interleave lines"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    line = (json.dumps(record) + '\n').encode('utf-8')
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+def read_metrics_records(path: str) -> List[Dict]:
+    """All records of a JSON Lines metrics file; a missing file has none"""
+    try:
+        with open(path, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+def _prometheus_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def write_prometheus(path: str, record: Dict) -> None:
+    """Write the numeric fields of a record as Prometheus text-format gauges"""
+    labels = ','.join(f'{name}="{_prometheus_label(record.get(name) or "")}"'
+                      for name in ('run_id', 'function', 'input_file'))
+    lines = []
+    for key, value in record.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and key != 'pid':
+            lines.append(f'# TYPE {PROMETHEUS_PREFIX}{key} gauge')
+            lines.append(f'{PROMETHEUS_PREFIX}{key}{{{labels}}} {value}')
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(tmp, path)
+
+def render_plot(metrics: Dict, function_name: str, plot_file: str) -> str:
+    """Render the CPU and memory series of one run to a PNG and return its path"""
+    import matplotlib
+    matplotlib.use('Agg')  # No display needed; also avoids GUI toolkit startup
+    import matplotlib.pyplot as plt
+    
+    # Create subplots
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(8, 8))
+    
+    # Plot CPU usage
+    ax1.plot(metrics['timestamps'], metrics['cpu_usage'], 'b-', label='CPU Usage (%)')
+    ax1.set_xlabel('Time (seconds)')
+    ax1.set_ylabel('CPU Usage (%)')
+    ax1.set_title(f'CPU Usage - {function_name}')
+    ax1.grid(True)
+    ax1.legend()
+    
+    # Plot Memory usage
+    ax2.plot(metrics['timestamps'], metrics['memory_usage'], 'r-', label='Memory Usage (MB)')
+    ax2.set_xlabel('Time (seconds)')
+    ax2.set_ylabel('Memory Usage (MB)')
+    ax2.set_title(f'Memory Usage - {function_name}')
+    ax2.grid(True)
+    ax2.legend()
+    
+    plt.tight_layout()
+    plt.savefig(plot_file)
+    plt.close(fig)
+    
+    return plot_file
+
+def _plot_file_for(metrics_file: str) -> str:
+    """performance_logs/metrics_<function>_<run id>.json -> performance_logs/performance_plot_<function>_<run id>.png"""
+    directory, name = os.path.split(metrics_file)
+    return os.path.join(directory, 'performance_plot_' + name[len('metrics_'):-len('.json')] + '.png')
+
+def render_pending(metrics_files: Optional[List[str]] = None, force: bool = False) -> List[str]:
+    """Render plots for saved metrics files (default: all in performance_logs that have none yet)"""
+    if metrics_files is None:
+        metrics_files = sorted(glob.glob(os.path.join('performance_logs', 'metrics_*.json')))
+    rendered = []
+    for metrics_file in metrics_files:
+        plot_file = _plot_file_for(metrics_file)
+        if os.path.exists(plot_file) and not force:
+            continue
+        with open(metrics_file, 'r') as f:
+            metrics = json.load(f)
+        if not metrics.get('timestamps'):
+            continue
+        rendered.append(render_plot(metrics, metrics.get('function', 'job'), plot_file))
+    return rendered
+
+
+def report_performance(monitor: PerformanceMonitor, function_name: str, records_processed: int,
+                       plot: bool = False, run_id: Optional[str] = None, input_file: Optional[str] = None,
+                       metrics_out: Optional[str] = None, prom_out: Optional[str] = None,
+                       history: Optional[str] = None) -> Dict:
+    """Stop monitoring, save the raw metrics (and the plot if asked), write the structured
+    record to metrics_out / prom_out / the history database and print the human-readable
+    metrics block to stderr"""
+    summary = monitor.stop_monitoring(records_processed=records_processed)
+    # Every output of the run (metrics file, record, history row) carries the same unique id
+    run_id = run_id or new_run_id()
+
+    # Ensure performance_logs directory exists
+    if not os.path.exists('performance_logs'):
+        os.makedirs('performance_logs')
+
+    # Raw metrics are cheap to write; plotting is deferred unless requested
+    metrics_file = monitor.save_metrics(function_name, run_id)
+    print(f"\nPerformance metrics saved to: {metrics_file}", file=sys.stderr)
+    record = monitor.to_record(function_name, run_id, input_file)
+    record['metrics_file'] = metrics_file
+    if plot:
+        plot_file = render_plot(monitor.metrics, function_name, _plot_file_for(metrics_file))
+        record['plot_file'] = plot_file
+        print(f"Performance plot saved to: {plot_file}", file=sys.stderr)
+    if metrics_out:
+        append_metrics_record(metrics_out, record)
+    if prom_out:
+        write_prometheus(prom_out, record)
+    if history:
+        from job_history import record_metrics
+        record_metrics(record, history)
+
+    # Print performance metrics
+    print("\nPERFORMANCE_METRICS_START", file=sys.stderr)
+    for key, value in summary.items():
+        print(f"{key}: {value}", file=sys.stderr)
+    print("PERFORMANCE_METRICS_END", file=sys.stderr)
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render performance plots from saved metrics")
+    parser.add_argument("command", choices=["render"])
+    parser.add_argument("metrics_files", nargs="*",
+                        help="metrics JSON files (default: every one in performance_logs without a plot)")
+    parser.add_argument("--force", action="store_true", help="re-render plots that already exist")
+    args = parser.parse_args()
+    for plot_file in render_pending(args.metrics_files or None, args.force):
+        print(f"Performance plot saved to: {plot_file}")
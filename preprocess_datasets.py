@@ -1,26 +1,75 @@
 import pandas as pd
 import numpy as np
 import os
+import glob
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from source_manifest import load_manifest, save_manifest, is_current, dataset_entry
+
+# Feather needs pyarrow; without it the columnar cache falls back to pickle
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'feather'
+except ImportError:
+    CACHE_FORMAT = 'pkl'
+
+# Bump whenever a change alters the generated kaggleinput files, so they are rebuilt
+PREPROCESS_VERSION = 1
+
+RETAIL_SOURCE = os.path.join('datasets', 'Online_Retail_II.xlsx')
+ECOMMERCE_SOURCE = os.path.join('datasets', 'E-commerce Customer Behavior - Sheet1.csv')
+CACHE_DIR = os.path.join('.cache', 'preprocess')
+# The only Excel columns the retail outputs depend on
+RETAIL_COLUMNS = ['Invoice', 'Quantity', 'Price', 'Customer ID']
+
+def _cache_file(source):
+    """Cache file for the current version (size and mtime) of a source file"""
+    stat = os.stat(source)
+    version = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8')).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(source)}-{version}.{CACHE_FORMAT}")
+
+def load_retail_columns(file_path):
+    """Read the needed retail columns, from the columnar cache when the workbook is unchanged"""
+    cache_file = _cache_file(file_path)
+    if os.path.exists(cache_file):
+        print(f"Reading cached columns from: {cache_file}")
+        return pd.read_feather(cache_file) if CACHE_FORMAT == 'feather' else pd.read_pickle(cache_file)
+    
+    print(f"Reading file from: {file_path} (first run; caching the needed columns)")
+    df = pd.read_excel(file_path, usecols=RETAIL_COLUMNS)
+    
+    # Downcast losslessly: Price stays float64 so the written amounts are unchanged
+    invoice = df['Invoice']
+    df['Invoice'] = invoice.where(invoice.isna(), invoice.astype(str)).astype('category')
+    df['Quantity'] = pd.to_numeric(df['Quantity'], downcast='integer')
+    df['Customer ID'] = df['Customer ID'].astype(np.float32)  # IDs are exact in float32; NaN marks missing
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for stale in glob.glob(os.path.join(CACHE_DIR, f"{os.path.basename(file_path)}-*")):
+        os.remove(stale)
+    tmp = f"{cache_file}.{os.getpid()}.tmp"
+    if CACHE_FORMAT == 'feather':
+        df.to_feather(tmp)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, cache_file)
+    return df
 
 def preprocess_retail_data():
     print("\nProcessing Online Retail II dataset...")
     
-    # Read the Excel file
-    file_path = os.path.join('datasets', 'Online_Retail_II.xlsx')
-    print(f"Reading file from: {file_path}")
-    
-    df = pd.read_excel(file_path)
+    df = load_retail_columns(RETAIL_SOURCE)
     print(f"Initial shape: {df.shape}")
     
-    # Basic preprocessing and data cleaning
-    df = df.dropna(subset=['Invoice', 'Quantity', 'Price', 'Customer ID'])
-    df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-    df['Customer ID'] = df['Customer ID'].astype(int)
-    
-    # Remove cancelled orders, negative/zero quantities and prices
-    df = df[~df['Invoice'].astype(str).str.contains('^C', regex=True)]
-    df = df[df['Quantity'] > 0]
-    df = df[df['Price'] > 0]
+    # One mask for all cleaning rules: complete rows, no cancelled orders (invoice "C..."),
+    # positive quantities and prices
+    mask = (df[RETAIL_COLUMNS].notna().all(axis=1)
+            & ~df['Invoice'].astype(str).str.startswith('C')
+            & (df['Quantity'] > 0)
+            & (df['Price'] > 0))
+    df = df.loc[mask, ['Quantity', 'Price']]
     
     print(f"Shape after cleaning: {df.shape}")
     
@@ -28,28 +77,29 @@ def preprocess_retail_data():
     df['TotalAmount'] = df['Quantity'] * df['Price']
     
     # Save relevant columns
-    df['TotalAmount'].to_csv('kaggleinput/retail_transaction_amounts.txt', index=False, header=False)
-    df['Quantity'].to_csv('kaggleinput/retail_quantities.txt', index=False, header=False)
-    df['Price'].to_csv('kaggleinput/retail_prices.txt', index=False, header=False)
+    outputs = {
+        'TotalAmount': 'kaggleinput/retail_transaction_amounts.txt',
+        'Quantity': 'kaggleinput/retail_quantities.txt',
+        'Price': 'kaggleinput/retail_prices.txt'
+    }
+    for column, output_path in outputs.items():
+        df[column].to_csv(output_path, index=False, header=False)
     
     print("\nRetail dataset columns saved:")
     print("- retail_transaction_amounts.txt: Total amount per transaction (Quantity * Price)")
     print("- retail_quantities.txt: Number of items per transaction")
     print("- retail_prices.txt: Unit price of items")
+    return list(outputs.values())
 
 def preprocess_ecommerce_data():
     print("\nProcessing E-commerce Customer Behavior dataset...")
     
     # Read the CSV file
-    file_path = os.path.join('datasets', 'E-commerce Customer Behavior - Sheet1.csv')
+    file_path = ECOMMERCE_SOURCE
     print(f"Reading file from: {file_path}")
+    outputs = []
     
     try:
-        df = pd.read_csv(file_path)
-        print(f"Initial shape: {df.shape}")
-        print("Available columns:", df.columns.tolist())
-        
-        # Basic preprocessing
         numeric_columns = {
             'Total Spend': 'ecom_purchase_amounts.txt',
             'Days Since Last Purchase': 'ecom_days_since_purchase.txt',
@@ -57,6 +107,11 @@ def preprocess_ecommerce_data():
             'Average Rating': 'ecom_ratings.txt'
         }
         
+        # Only parse the columns that are written out
+        df = pd.read_csv(file_path, usecols=lambda column: column in numeric_columns)
+        print(f"Initial shape: {df.shape}")
+        print("Loaded columns:", df.columns.tolist())
+        
         # Save each numeric column
         for column, filename in numeric_columns.items():
             print(f"\nProcessing column: {column}")
@@ -66,6 +121,7 @@ def preprocess_ecommerce_data():
                 print(f"Found {len(valid_data)} valid rows for {column}")
                 output_path = f'kaggleinput/{filename}'
                 valid_data.to_csv(output_path, index=False, header=False)
+                outputs.append(output_path)
                 print(f"Saved to {output_path}")
             else:
                 print(f"Warning: Column '{column}' not found in dataset!")
@@ -75,19 +131,63 @@ def preprocess_ecommerce_data():
         print("- ecom_days_since_purchase.txt: Days since last purchase")
         print("- ecom_items_purchased.txt: Number of items purchased")
         print("- ecom_ratings.txt: Average customer ratings")
+        return outputs
     
     except Exception as e:
         print(f"Error processing e-commerce data: {str(e)}")
+        return None
+
+# Dataset name -> (source file, pipeline returning the outputs it wrote)
+DATASETS = {
+    'retail': (RETAIL_SOURCE, preprocess_retail_data),
+    'ecommerce': (ECOMMERCE_SOURCE, preprocess_ecommerce_data)
+}
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the kaggleinput files from the raw datasets")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild every dataset even if the manifest says it is up to date")
+    args = parser.parse_args()
+    
     # Create kaggleinput directory if it doesn't exist
     os.makedirs('kaggleinput', exist_ok=True)
     
-    # Process both datasets
-    preprocess_retail_data()
-    preprocess_ecommerce_data()
+    # Skip datasets whose source, preprocessing version and outputs are unchanged
+    start = time.time()
+    manifest = load_manifest()
+    stale = []
+    for name, (source, _) in DATASETS.items():
+        entry = manifest['datasets'].get(name)
+        if not args.force and is_current(entry, source, PREPROCESS_VERSION):
+            manifest['datasets'][name] = dataset_entry(source, PREPROCESS_VERSION, list(entry['outputs']), entry)
+            print(f"{name}: up to date, skipped")
+        else:
+            stale.append(name)
+    print(f"Manifest check took {(time.time() - start) * 1000:.0f} ms")
+    
+    # The datasets are independent; process them in parallel
+    failed = []
+    if stale:
+        with ProcessPoolExecutor(max_workers=len(stale)) as pool:
+            jobs = {name: pool.submit(DATASETS[name][1]) for name in stale}
+            for name, job in jobs.items():
+                try:
+                    outputs = job.result()
+                except Exception as e:
+                    print(f"Error processing {name} data: {str(e)}")
+                    outputs = None
+                if outputs:
+                    manifest['datasets'][name] = dataset_entry(DATASETS[name][0], PREPROCESS_VERSION, outputs)
+                else:
+                    # Never leave an entry that could vouch for outputs of a failed run
+                    manifest['datasets'].pop(name, None)
+                    failed.append(name)
     
-    print("\nAll preprocessing completed successfully!")
+    save_manifest(manifest)
+    if failed:
+        print(f"\nPreprocessing failed for: {', '.join(failed)}")
+    else:
+        print("\nAll preprocessing completed successfully!")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
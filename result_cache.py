@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Persistent cache of job results for repeated (input file, function) runs.
+
+Entries are keyed by the SHA-256 of the input file contents, the function
+name, the --approx flag and stats_core.REDUCER_VERSION, so editing the
+data or changing reducer semantics never serves a stale answer. Content
+hashes are remembered per (path, size, mtime), or taken from the
+preprocessing manifest (source_manifest.py), so unchanged files are not
+re-hashed. The cache directory is bounded in size; the least recently
+used entries are evicted first.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from stats_core import REDUCER_VERSION
+from source_manifest import output_hash
+
+RESULT_CACHE_DIR = os.path.join('.cache', 'results')
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+HASH_CHUNK = 1024 * 1024
+
+class ResultCache:
+    def __init__(self, cache_dir: str = RESULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hash_index_file = os.path.join(cache_dir, 'content_hashes.json')
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def content_hash(self, input_file: str) -> str:
+        """SHA-256 of a file, reused while its size and mtime are unchanged"""
+        path = os.path.abspath(input_file)
+        stat = os.stat(path)
+        index = self._load_hash_index()
+        known = index.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        # Files built by preprocess_datasets.py are already hashed in its manifest
+        manifest_hash = output_hash(path)
+        if manifest_hash:
+            return manifest_hash
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+        index[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        self._write_json(self.hash_index_file, index)
+        return digest.hexdigest()
+
+    def key(self, input_file: str, function: str, approx: bool = False) -> str:
+        parts = [self.content_hash(input_file), function.lower(), 'approx' if approx else 'exact', str(REDUCER_VERSION)]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached entry, or None on a miss"""
+        entry_file = self._entry_file(key)
+        try:
+            with open(entry_file, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Refresh the access time used for LRU eviction
+        os.utime(entry_file, None)
+        return entry
+
+    def put(self, key: str, input_file: str, function: str, results: List[str], runtime: float) -> None:
+        entry = {
+            'input_file': os.path.basename(input_file),
+            'function': function,
+            'results': results,
+            'runtime_seconds': runtime,
+            'reducer_version': REDUCER_VERSION,
+            'created': time.time()
+        }
+        self._write_json(self._entry_file(key), entry)
+        self._evict()
+
+    def _entry_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.json') and path != self.hash_index_file:
+                try:
+                    stat = os.stat(path)
+                except OSError:  # removed by a concurrent eviction
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def _load_hash_index(self) -> Dict:
+        try:
+            with open(self.hash_index_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_json(path: str, data) -> None:
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
@@ -0,0 +1,13 @@
+@echo off
+echo.
+echo ========== ALL STATISTICS ==========
+cd /d %~dp0
+
+call hadoop fs -rm -r /kaggle_output_all
+echo [*] Continuing even if delete failed...
+
+call hadoop jar "C:\hadoop-2.7.7\share\hadoop\tools\lib\hadoop-streaming-2.7.7.jar" -files mapper.py,combiner.py,stats_reducer.py,stats_core.py,job_progress.py -input /kaggleinput/kaggle_numbers.txt -output /kaggle_output_all -mapper "python mapper.py" -reducer "python stats_reducer.py all"
+
+echo.
+call hadoop fs -cat /kaggle_output_all/part-00000
+pause
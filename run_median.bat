@@ -16,9 +16,8 @@ set PYTHON_PATH=C:\Users\abdul\anaconda3\python.exe
 
 :: Run MapReduce job
 %HADOOP_HOME%\bin\hadoop jar %HADOOP_HOME%\share\hadoop\tools\lib\hadoop-streaming-2.7.7.jar ^
--file mapper.py ^
+-files mapper.py,combiner.py,stats_reducer.py,stats_core.py,job_progress.py ^
 -mapper "%PYTHON_PATH% mapper.py" ^
--file stats_reducer.py ^
 -reducer "%PYTHON_PATH% stats_reducer.py median" ^
 -input /kaggleinput/ecom_purchase_amounts.txt ^
 -output /kaggle_output_median
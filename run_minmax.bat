@@ -4,10 +4,21 @@ echo ========== MIN-MAX NORMALIZATION ==========
 cd /d %~dp0
 
 call hadoop fs -rm -r /kaggle_output_minmax
+call hadoop fs -rm -r /kaggle_output_normalized
 echo [*] Continuing even if delete failed...
 
-call hadoop jar "C:\hadoop-2.7.7\share\hadoop\tools\lib\hadoop-streaming-2.7.7.jar" -input /kaggleinput/kaggle_numbers.txt -output /kaggle_output_minmax -mapper "python mapper.py" -reducer "python stats_reducer.py minmax"
+:: Phase 1: global min and max from mergeable per-mapper partials
+call hadoop jar "C:\hadoop-2.7.7\share\hadoop\tools\lib\hadoop-streaming-2.7.7.jar" -files mapper.py,combiner.py,stats_reducer.py,stats_core.py,job_progress.py -input /kaggleinput/kaggle_numbers.txt -output /kaggle_output_minmax -mapper "python mapper.py moments" -combiner "python combiner.py" -reducer "python stats_reducer.py minmax --emit-range"
 
 echo.
 call hadoop fs -cat /kaggle_output_minmax/part-00000
+
+:: Phase 2: map-only pass that writes the normalized values
+:: The empty separator keeps TextOutputFormat from ending every value line with a tab
+if exist minmax_range.txt del minmax_range.txt
+call hadoop fs -get /kaggle_output_minmax/part-00000 minmax_range.txt
+call hadoop jar "C:\hadoop-2.7.7\share\hadoop\tools\lib\hadoop-streaming-2.7.7.jar" -D "mapred.textoutputformat.separator=" -files mapper.py,stats_core.py,minmax_range.txt -numReduceTasks 0 -input /kaggleinput/kaggle_numbers.txt -output /kaggle_output_normalized -mapper "python mapper.py normalize --range-file minmax_range.txt"
+
+echo.
+echo [*] Normalized values written to /kaggle_output_normalized
 pause
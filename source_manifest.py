@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Manifest of the preprocessing sources and the kaggleinput files built from them.
+
+For every dataset the manifest records the source file's SHA-256, size and
+mtime, the PREPROCESS_VERSION that built the outputs, and each output's
+SHA-256, size and mtime. preprocess_datasets.py skips a dataset whose
+source, code version and outputs all still match; files whose size and
+mtime are unchanged are trusted without re-hashing, so the check takes
+milliseconds. result_cache.py reads output hashes from here instead of
+hashing kaggleinput files itself.
+"""
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+MANIFEST_FILE = os.path.join('kaggleinput', 'manifest.json')
+HASH_CHUNK = 1024 * 1024
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_entry(path: str, known: Optional[Dict] = None) -> Dict:
+    """Hash, size and mtime of a file; the known hash is reused while size and mtime match"""
+    stat = os.stat(path)
+    if known and known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+        return known
+    return {'sha256': sha256_file(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def load_manifest(manifest_file: str = MANIFEST_FILE) -> Dict:
+    try:
+        with open(manifest_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'datasets': {}}
+
+def save_manifest(manifest: Dict, manifest_file: str = MANIFEST_FILE) -> None:
+    tmp = f'{manifest_file}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp, manifest_file)
+
+def is_current(entry: Optional[Dict], source: str, version: int) -> bool:
+    """True when a dataset's outputs were built by this code version from this exact source"""
+    if not entry or entry.get('version') != version or not os.path.exists(source):
+        return False
+    if file_entry(source, entry['source'])['sha256'] != entry['source']['sha256']:
+        return False
+    for path, known in entry['outputs'].items():
+        if not os.path.exists(path) or file_entry(path, known)['sha256'] != known['sha256']:
+            return False
+    return True
+
+def dataset_entry(source: str, version: int, outputs: List[str], previous: Optional[Dict] = None) -> Dict:
+    """Manifest entry for a dataset, reusing the hashes in previous for files that have not changed"""
+    previous = previous or {'source': None, 'outputs': {}}
+    return {
+        'source_path': source,
+        'source': file_entry(source, previous['source']),
+        'version': version,
+        'outputs': {path: file_entry(path, previous['outputs'].get(path)) for path in outputs}
+    }
+
+def output_hash(path: str, manifest: Optional[Dict] = None) -> Optional[str]:
+    """SHA-256 of a preprocessed file from the manifest, or None if it is unknown or has changed"""
+    manifest = manifest if manifest is not None else load_manifest()
+    target = os.path.abspath(path)
+    try:
+        stat = os.stat(target)
+    except OSError:
+        return None
+    for entry in manifest['datasets'].values():
+        for output, known in entry['outputs'].items():
+            if (os.path.abspath(output) == target and known['size'] == stat.st_size
+                    and known['mtime_ns'] == stat.st_mtime_ns):
+                return known['sha256']
+    return None
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+import math
+import bisect
+from array import array
+
+# Bump whenever a change alters reducer output, so cached results are invalidated
+REDUCER_VERSION = 1
+
+# Functions that can be answered from mergeable moments instead of raw values
+MOMENT_FUNCTIONS = ('stddev', 'skewness', 'kurtosis', 'minmax')
+# Functions that need order statistics (exact values, or a sketch with --approx)
+QUANTILE_FUNCTIONS = ('median', 'percentile')
+FUNCTIONS = ('median', 'stddev', 'minmax', 'percentile', 'skewness', 'kurtosis', 'all')
+# Mapper-to-reducer record encodings (--wire); typedbytes is implemented in typed_bytes.py
+WIRE_FORMATS = ('text', 'typedbytes')
+
+_numpy = None
+
+def load_numpy():
+    """Import NumPy on first use so jobs that never select don't pay for it"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+class Moments:
+    """Mergeable sufficient statistics: count, mean, central moments, min and max"""
+
+    __slots__ = ('n', 'mean', 'm2', 'm3', 'm4', 'min', 'max')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, x: float) -> None:
+        """Add one value in O(1) memory (Welford/Terriberry single-pass update)"""
+        n1 = self.n
+        n = n1 + 1
+        delta = x - self.mean
+        delta_n = delta / n
+        delta_n2 = delta_n * delta_n
+        term1 = delta * delta_n * n1
+
+        self.mean += delta_n
+        self.m4 += term1 * delta_n2 * (n * n - 3 * n + 3) + 6 * delta_n2 * self.m2 - 4 * delta_n * self.m3
+        self.m3 += term1 * delta_n * (n - 2) - 3 * delta_n * self.m2
+        self.m2 += term1
+        self.n = n
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def extend(self, values) -> 'Moments':
+        """Stream any iterable of floats through push()"""
+        push = self.push
+        for x in values:
+            push(x)
+        return self
+
+    @classmethod
+    def from_array(cls, arr) -> 'Moments':
+        """Vectorized partial aggregate of a float64 NumPy array"""
+        moments = cls()
+        n = len(arr)
+        if n == 0:
+            return moments
+        mean = float(arr.mean())
+        deviations = arr - mean
+        squared = deviations * deviations
+        moments.n = n
+        moments.mean = mean
+        moments.m2 = float(squared.sum())
+        moments.m3 = float((squared * deviations).sum())
+        moments.m4 = float((squared * squared).sum())
+        moments.min = float(arr.min())
+        moments.max = float(arr.max())
+        return moments
+
+    def merge(self, other: 'Moments') -> 'Moments':
+        """Combine another partial aggregate into this one (Chan/Pebay update)"""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return self
+
+        n_a, n_b = self.n, other.n
+        n = n_a + n_b
+        delta = other.mean - self.mean
+
+        m4 = (self.m4 + other.m4
+              + delta ** 4 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b) / n ** 3
+              + 6 * delta ** 2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2) / n ** 2
+              + 4 * delta * (n_a * other.m3 - n_b * self.m3) / n)
+        m3 = (self.m3 + other.m3
+              + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+              + 3 * delta * (n_a * other.m2 - n_b * self.m2) / n)
+        m2 = self.m2 + other.m2 + delta ** 2 * n_a * n_b / n
+
+        self.n = n
+        self.mean = self.mean + delta * n_b / n
+        self.m2 = m2
+        self.m3 = m3
+        self.m4 = m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def stddev(self) -> float:
+        return math.sqrt(self.m2 / self.n)
+
+    def skewness(self) -> float:
+        if self.m2 == 0:
+            return 0
+        return math.sqrt(self.n) * self.m3 / self.m2 ** 1.5
+
+    def kurtosis(self) -> float:
+        """Excess kurtosis (0 for a normal distribution)"""
+        if self.m2 == 0:
+            return 0
+        return self.n * self.m4 / (self.m2 * self.m2) - 3
+
+    def to_payload(self) -> str:
+        """Serialize the state (repr keeps floats exact)"""
+        fields = (self.n, self.mean, self.m2, self.m3, self.m4, self.min, self.max)
+        return ",".join(repr(f) for f in fields)
+
+    def to_record(self) -> str:
+        """Serialize as a mapper output line"""
+        return "moments\t" + self.to_payload()
+
+    @classmethod
+    def from_payload(cls, payload: str) -> 'Moments':
+        """Parse the value part of a 'moments' record"""
+        n, mean, m2, m3, m4, min_val, max_val = payload.split(',')
+        moments = cls()
+        moments.n = int(n)
+        moments.mean = float(mean)
+        moments.m2 = float(m2)
+        moments.m3 = float(m3)
+        moments.m4 = float(m4)
+        moments.min = float(min_val)
+        moments.max = float(max_val)
+        return moments
+
+    @classmethod
+    def from_counts(cls, counts: dict) -> 'Moments':
+        """Aggregate of value -> count pairs; each group of equal values has zero central moments.
+
+        Merging per distinct value sums in a different order than streaming the raw values, so
+        the result equals the streaming one up to floating-point rounding, not bit for bit.
+        """
+        moments = cls()
+        group = cls()
+        for x, c in counts.items():
+            group.n, group.mean, group.min, group.max = c, x, x, x
+            moments.merge(group)
+        return moments
+
+def normalize(values, lo: float, hi: float):
+    """Min-max scale values (a NumPy array or any iterable of floats) into [0, 1]"""
+    span = hi - lo
+    if hasattr(values, 'dtype'):
+        return (values - lo) / span if span else values * 0.0
+    return [(x - lo) / span for x in values] if span else [0.0 for _ in values]
+
+def parse_range(lines) -> tuple:
+    """(min, max) from the "Range" line that stats_reducer.py --emit-range prints"""
+    for line in lines:
+        key, _, payload = line.strip().partition('\t')
+        if key == "Range":
+            lo, hi = payload.split(',')
+            return float(lo), float(hi)
+    raise ValueError("No Range line found; run the minmax job with --emit-range")
+
+def counts_to_payload(counts: dict) -> str:
+    """Serialize value -> count pairs as 'value:count,...'"""
+    return ','.join(f"{x!r}:{c}" for x, c in counts.items())
+
+def counts_from_payload(payload: str) -> dict:
+    counts = {}
+    for pair in payload.split(','):
+        x, c = pair.rsplit(':', 1)
+        counts[float(x)] = int(c)
+    return counts
+
+def weighted_order_statistics(counts: dict, ks) -> list:
+    """k-th smallest values (0-based) of the multiset described by value -> count pairs"""
+    distinct = sorted(counts)
+    cumulative = []
+    total = 0
+    for x in distinct:
+        total += counts[x]
+        cumulative.append(total)
+    return [distinct[bisect.bisect_right(cumulative, k)] for k in ks]
+
+def order_statistics(values, ks) -> list:
+    """Return the k-th smallest values (0-based) for each k in ks.
+
+    Uses numpy.partition (introselect, expected linear time) when NumPy is
+    installed. A pure-Python selection loop is slower than CPython's C sort,
+    so without NumPy this falls back to sorting a copy.
+    """
+    np = load_numpy()
+    if np:
+        if isinstance(values, array):
+            arr = np.frombuffer(values, dtype=np.float64)
+        else:
+            arr = np.asarray(values, dtype=np.float64)
+        partitioned = np.partition(arr, ks)
+        return [float(partitioned[k]) for k in ks]
+    ordered = sorted(values)
+    return [ordered[k] for k in ks]
+
+def median_indices(n: int) -> list:
+    """Order statistic(s) whose mean is the median of n values"""
+    return [n // 2] if n % 2 == 1 else [n // 2 - 1, n // 2]
+
+def percentile_index(n: int, p: float) -> int:
+    """Nearest-rank percentile index (ceil-based, 0-based)"""
+    return int(math.ceil((p / 100) * n)) - 1
+
+def median(values) -> float:
+    ranks = median_indices(len(values))
+    selected = order_statistics(values, ranks)
+    return selected[0] if len(selected) == 1 else (selected[0] + selected[1]) / 2
+
+def percentile(values, p: float) -> float:
+    return order_statistics(values, [percentile_index(len(values), p)])[0]
+
+class StatsAccumulator:
+    """Mergeable reduce-side state for one statistical function.
+
+    The reducer, the combiner-style map phase of local_runner.py and any
+    other driver feed values or partial records into an accumulator, merge
+    accumulators together, and format the final output lines from it.
+    """
+
+    def __init__(self, func: str, approx: bool = False):
+        if func not in FUNCTIONS:
+            raise ValueError(f"Unknown function: {func}")
+        self.func = func
+        self.approx = approx and func in QUANTILE_FUNCTIONS
+        self.moments = Moments() if func in MOMENT_FUNCTIONS or func == 'all' else None
+        self.values = array('d') if func == 'all' or (func in QUANTILE_FUNCTIONS and not self.approx) else None
+        # value -> count pairs from "counts" records (duplicate-heavy inputs)
+        self.counts = None
+        self.sketch = None
+        if self.approx:
+            from quantile_sketch import KLLSketch
+            self.sketch = KLLSketch()
+
+    @property
+    def n(self) -> int:
+        if self.values is not None:
+            return len(self.values) + (sum(self.counts.values()) if self.counts else 0)
+        if self.sketch is not None:
+            return self.sketch.n
+        return self.moments.n
+
+    def value_adder(self):
+        """Return the cheapest callable that adds one raw value"""
+        if self.func == 'all':
+            push = self.moments.push
+            append = self.values.append
+
+            def add(x):
+                push(x)
+                append(x)
+            return add
+        if self.sketch is not None:
+            return self.sketch.update
+        if self.values is not None:
+            return self.values.append
+        return self.moments.push
+
+    def add_values(self, values) -> 'StatsAccumulator':
+        if isinstance(values, memoryview) and load_numpy():
+            return self.add_array(_numpy.frombuffer(values, dtype=_numpy.float64))
+        if self.moments is None and self.sketch is None:
+            # Exact quantiles only keep the values: bulk copy without a per-value call
+            if isinstance(values, memoryview):
+                self.values.frombytes(values.cast('B'))
+            else:
+                self.values.extend(values)
+            return self
+        add = self.value_adder()
+        for x in values:
+            add(x)
+        return self
+
+    def add_array(self, arr) -> 'StatsAccumulator':
+        """Add a float64 NumPy array using array operations instead of per-value calls"""
+        if self.sketch is not None:
+            return self.add_values(arr.tolist())
+        if self.moments is not None:
+            self.moments.merge(Moments.from_array(arr))
+        if self.values is not None:
+            self.values.frombytes(arr.tobytes())
+        return self
+
+    def add_record(self, key: str, payload: str) -> None:
+        """Add one mapper/combiner output record"""
+        if key == "val":
+            self.value_adder()(float(payload))
+        elif key == "moments" and self.values is None and self.sketch is None:
+            self.moments.merge(Moments.from_payload(payload))
+        elif key == "counts" and self.values is not None:
+            self.add_counts(counts_from_payload(payload))
+        elif key == "sketch" and self.sketch is not None:
+            self.sketch.merge(type(self.sketch).from_payload(payload))
+        else:
+            raise ValueError(f"{self.func} cannot use {key} records")
+
+    def add_counts(self, counts: dict) -> 'StatsAccumulator':
+        """Add value -> count pairs; exact quantiles are then selected by weight, not by copies"""
+        self._merge_counts(counts)
+        if self.moments is not None:
+            self.moments.merge(Moments.from_counts(counts))
+        return self
+
+    def _merge_counts(self, counts: dict) -> None:
+        if self.counts is None:
+            self.counts = {}
+        for x, c in counts.items():
+            self.counts[x] = self.counts.get(x, 0) + c
+
+    def order_statistics(self, ks) -> list:
+        """k-th smallest of everything added, raw values and counted values alike"""
+        if not self.counts:
+            return order_statistics(self.values, ks)
+        counts = dict(self.counts)
+        for x in self.values:
+            counts[x] = counts.get(x, 0) + 1
+        return weighted_order_statistics(counts, ks)
+
+    def to_state(self) -> dict:
+        """JSON-serializable moments/sketch state; raw values are persisted by the caller"""
+        return {
+            'function': self.func,
+            'approx': self.approx,
+            'moments': self.moments.to_payload() if self.moments is not None else None,
+            'sketch': self.sketch.to_payload() if self.sketch is not None else None,
+            'counts': counts_to_payload(self.counts) if self.counts else None
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, values=None) -> 'StatsAccumulator':
+        accumulator = cls(state['function'], approx=state['approx'])
+        if state['moments'] is not None:
+            accumulator.moments = Moments.from_payload(state['moments'])
+        if state['sketch'] is not None:
+            accumulator.sketch = type(accumulator.sketch).from_payload(state['sketch'])
+        if values is not None:
+            accumulator.values = values
+        if state.get('counts'):
+            accumulator.counts = counts_from_payload(state['counts'])
+        return accumulator
+
+    def merge(self, other: 'StatsAccumulator') -> 'StatsAccumulator':
+        if self.moments is not None:
+            self.moments.merge(other.moments)
+        if self.values is not None:
+            self.values.extend(other.values)
+            if other.counts:
+                # other.moments already covers these counts
+                self._merge_counts(other.counts)
+        if self.sketch is not None:
+            self.sketch.merge(other.sketch)
+        return self
+
+    def results(self) -> list:
+        """Format the output lines, exactly as stats_reducer.py prints them"""
+        func, n, moments = self.func, self.n, self.moments
+        if not n:
+            # No input (an empty file, or a reducer that got no keys): nothing to report
+            return []
+
+        if func == "median" and self.approx:
+            estimates = [self.sketch.value_at_rank(rank) for rank in median_indices(n)]
+            return [f"Median\t{sum(estimates) / len(estimates)}",
+                    f"RankErrorBound\t{self.sketch.rank_error()}"]
+        if func == "median":
+            selected = self.order_statistics(median_indices(n))
+            return [f"Median\t{selected[0] if len(selected) == 1 else (selected[0] + selected[1]) / 2}"]
+        if func == "stddev":
+            return [f"StandardDeviation\t{moments.stddev()}"]
+        if func == "minmax":
+            return [f"Min-Max\t{moments.min:.4f}-{moments.max:.4f}"]
+        if func == "percentile" and self.approx:
+            return [f"90thPercentile\t{self.sketch.value_at_rank(percentile_index(n, 90))}",
+                    f"RankErrorBound\t{self.sketch.rank_error()}"]
+        if func == "percentile":
+            return [f"90thPercentile\t{self.order_statistics([percentile_index(n, 90)])[0]}"]
+        if func == "skewness":
+            return [f"Skewness\t{moments.skewness()}"]
+        if func == "kurtosis":
+            return [f"Kurtosis\t{moments.kurtosis()}"]
+
+        # "all": a single selection answers both the median and the 90th percentile
+        median_ranks = median_indices(n)
+        selected = self.order_statistics(median_ranks + [percentile_index(n, 90)])
+        middle = selected[:len(median_ranks)]
+        return [
+            f"Median\t{sum(middle) / len(middle)}",
+            f"StandardDeviation\t{moments.stddev()}",
+            f"Min-Max\t{moments.min:.4f}-{moments.max:.4f}",
+            f"90thPercentile\t{selected[-1]}",
+            f"Skewness\t{moments.skewness()}",
+            f"Kurtosis\t{moments.kurtosis()}"
+        ]
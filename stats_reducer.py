@@ -1,93 +1,161 @@
 #!/usr/bin/env python3
-import sys
-import math
+import io
 import os
+import sys
+import argparse
+import itertools
+from stats_core import StatsAccumulator, FUNCTIONS, WIRE_FORMATS, load_numpy
+from job_progress import Reporter, NullReporter
+
+# Bytes of stdin parsed at once by the vectorized engine
+BLOCK_SIZE = 8 * 1024 * 1024
+# With --engine auto, smaller inputs skip the NumPy import; it costs more than it saves
+AUTO_NUMPY_MIN_BYTES = 1024 * 1024
 
 # Try to import performance monitoring, but don't fail if it's not available
 try:
-    from performance_monitor import PerformanceMonitor
+    from performance_monitor import PerformanceMonitor, report_performance
     performance_monitoring_enabled = True
 except ImportError:
     performance_monitoring_enabled = False
 
-if len(sys.argv) != 2:
-    print("Usage: stats_reducer.py <function>", file=sys.stderr)
+parser = argparse.ArgumentParser(description="Reduce mapper output to a single statistic")
+parser.add_argument("function", help=", ".join(FUNCTIONS))
+parser.add_argument("--approx", action="store_true",
+                    help="estimate median/percentile from mergeable KLL sketches")
+parser.add_argument("--engine", choices=["auto", "numpy", "python"], default="auto",
+                    help="vectorized NumPy parsing and arithmetic, or the pure-Python loop (auto: NumPy if installed)")
+parser.add_argument("--emit-range", action="store_true",
+                    help="also print the exact 'Range\tmin,max' that 'mapper.py normalize' reads")
+parser.add_argument("--wire", choices=WIRE_FORMATS, default="text",
+                    help="typedbytes: read binary records (stream.reduce.input=typedbytes)")
+parser.add_argument("--progress", action=argparse.BooleanOptionalAction, default=None,
+                    help="write reporter:counter/status progress lines to stderr (default: only under Hadoop)")
+parser.add_argument("--sample-interval", type=float, default=None,
+                    help="seconds between performance monitor samples (default: 0.1)")
+parser.add_argument("--plot", action="store_true",
+                    help="render the performance plot now instead of with 'performance_monitor.py render'")
+parser.add_argument("--run-id", default=None, help="id recorded with this run's metrics")
+parser.add_argument("--input-name", default=None, help="input file name recorded with the metrics")
+parser.add_argument("--metrics-out", default=None, help="append this run's metrics as a JSON line to this file")
+parser.add_argument("--prom-out", default=None, help="write this run's metrics in Prometheus text format to this file")
+parser.add_argument("--history", default=None, metavar="DB",
+                    help="also store this run's metrics in this SQLite job history (see job_history.py)")
+args = parser.parse_args()
+
+np = load_numpy() if args.engine == "numpy" else None
+if args.engine == "numpy" and not np:
+    print("The numpy engine requires NumPy: pip install numpy", file=sys.stderr)
     sys.exit(1)
 
-func = sys.argv[1].lower()
-values = []
+func = args.function.lower()
+try:
+    accumulator = StatsAccumulator(func, approx=args.approx)
+except ValueError as e:
+    print(e, file=sys.stderr)
+    sys.exit(1)
 
 # Initialize performance monitor if available
 if performance_monitoring_enabled:
     try:
-        monitor = PerformanceMonitor()
+        monitor = PerformanceMonitor(interval=args.sample_interval) if args.sample_interval else PerformanceMonitor()
         monitor.start_monitoring()
     except Exception as e:
         print(f"Warning: Performance monitoring failed to start: {e}", file=sys.stderr)
         performance_monitoring_enabled = False
 
-# Read and process input
-for line in sys.stdin:
-    _, val = line.strip().split('\t')
-    values.append(float(val))
-
-n = len(values)
-
-# Process based on function type
-if func == "median":
-    values.sort()
-    median = values[n // 2] if n % 2 == 1 else (values[n // 2 - 1] + values[n // 2]) / 2
-    print(f"Median\t{median}")
-
-elif func == "stddev":
-    mean = sum(values) / n
-    variance = sum((x - mean) ** 2 for x in values) / n
-    stddev = math.sqrt(variance)
-    print(f"StandardDeviation\t{stddev}")
-
-elif func == "minmax":
-    min_val = min(values)
-    max_val = max(values)
-    normalized = [(x - min_val) / (max_val - min_val) if max_val > min_val else 0 for x in values]
-    # Print in the same format as other functions, with a simple summary
-    print(f"Min-Max\t{min_val:.4f}-{max_val:.4f}")
-
-elif func == "percentile":
-    values.sort()
-    p = 90
-    index = int(math.ceil((p / 100) * n)) - 1
-    print(f"90thPercentile\t{values[index]}")
-
-elif func == "skewness":
-    mean = sum(values) / n
-    stddev = math.sqrt(sum((x - mean) ** 2 for x in values) / n)
-    if stddev == 0:
-        skewness = 0
+# Hadoop streaming turns these stderr lines into the job's counters and task status; it exports
+# the task id to every streaming process, so elsewhere they would only clutter stderr
+progress = args.progress if args.progress is not None else bool(
+    os.environ.get("mapreduce_task_id") or os.environ.get("mapred_task_id"))
+reporter = Reporter(records=lambda: accumulator.n) if progress else NullReporter()
+
+def read_blocks(stream):
+    """Yield large chunks of a binary stream that end on line boundaries"""
+    leftover = b''
+    while True:
+        chunk = stream.read(BLOCK_SIZE)
+        if not chunk:
+            break
+        chunk = leftover + chunk
+        cut = chunk.rfind(b'\n') + 1
+        leftover = chunk[cut:]
+        if cut:
+            yield chunk[:cut]
+    if leftover:
+        yield leftover
+
+def process_lines(lines):
+    for line in lines:
+        key, val = line.strip().split('\t')
+        if key == "val":
+            add_value(float(val))
+        else:
+            accumulator.add_record(key, val)
+
+# Read and process input. Raw "val" records go straight into the accumulator
+# (one pass, constant memory for moment-based functions); "moments" and
+# "sketch" partials from aggregating mappers are merged.
+add_value = accumulator.value_adder()
+blocks = read_blocks(sys.stdin.buffer) if args.wire == "text" else None
+if args.engine == "auto" and blocks is not None:
+    first = next(blocks, b'')
+    if len(first) >= AUTO_NUMPY_MIN_BYTES:
+        np = load_numpy()
+    blocks = itertools.chain([first], blocks)
+reporter.status(f"{func}: reading input")
+try:
+    if args.wire == "typedbytes":
+        # Only typedbytes jobs ship typed_bytes.py to the task nodes
+        from typed_bytes import VALUES_KEY, read_records, unpack_values
+        # Packed float64 blocks need no parsing; NumPy only saves the per-value arithmetic
+        np = load_numpy() if args.engine != "python" else None
+        for key, value in read_records(sys.stdin.buffer):
+            reporter.add(len(value))
+            if key == VALUES_KEY:
+                if np:
+                    accumulator.add_array(np.frombuffer(value, dtype='<f8'))
+                else:
+                    accumulator.add_values(unpack_values(value))
+            else:
+                accumulator.add_record(key, value)
+    elif np:
+        # Parse whole blocks of "val" records into arrays and aggregate them vectorized
+        for block in blocks:
+            reporter.add(len(block))
+            text = block.decode()
+            if not text.strip():
+                continue
+            if text.count('\t') == text.count('val\t'):
+                accumulator.add_array(np.loadtxt(io.StringIO(text), delimiter='\t', usecols=1,
+                                                 dtype=np.float64, ndmin=1))
+            else:
+                process_lines(line for line in text.splitlines() if line.strip())
     else:
-        skewness = sum(((x - mean) / stddev) ** 3 for x in values) / n
-    print(f"Skewness\t{skewness}")
-
-else:
-    print(f"Unknown function: {func}", file=sys.stderr)
+        for block in blocks:
+            reporter.add(len(block))
+            process_lines(line for line in block.decode().splitlines() if line.strip())
+except ValueError as e:
+    print(e, file=sys.stderr)
     sys.exit(1)
 
+reporter.flush()
+n = accumulator.n
+reporter.status(f"{func}: computing results from {n} records")
+
+if not n:
+    print("No input records; nothing to report", file=sys.stderr)
+for result in accumulator.results():
+    print(result)
+if args.emit_range and accumulator.moments is not None and n:
+    print(f"Range\t{accumulator.moments.min!r},{accumulator.moments.max!r}")
+reporter.status(f"{func}: done, {n} records")
+
 # Stop monitoring and save results if it was enabled
 if performance_monitoring_enabled:
     try:
-        summary = monitor.stop_monitoring(records_processed=n)
-
-        # Ensure performance_logs directory exists
-        if not os.path.exists('performance_logs'):
-            os.makedirs('performance_logs')
-
-        # Generate performance plot
-        plot_file = monitor.create_performance_plot(func)
-        print(f"\nPerformance plot saved to: {plot_file}", file=sys.stderr)
-
-        # Print performance metrics
-        print("\nPERFORMANCE_METRICS_START", file=sys.stderr)
-        for key, value in summary.items():
-            print(f"{key}: {value}", file=sys.stderr)
-        print("PERFORMANCE_METRICS_END", file=sys.stderr)
+        report_performance(monitor, func, n, plot=args.plot, run_id=args.run_id, input_file=args.input_name,
+                           metrics_out=args.metrics_out, prom_out=args.prom_out,
+                           history=args.history)
     except Exception as e:
         print(f"Warning: Performance monitoring failed: {e}", file=sys.stderr)
@@ -1,8 +1,18 @@
 #!/usr/bin/env python3
 import subprocess
 import os
+import sys
 import json
+import time
+import shutil
+import argparse
+import statistics
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from result_cache import ResultCache
+from stats_core import MOMENT_FUNCTIONS, WIRE_FORMATS, percentile
+from performance_monitor import new_run_id, run_metrics_path, read_metrics_records, render_pending
+from job_history import HISTORY_DB, record_run, metrics_fields
 
 def get_available_datasets():
     """Get list of available datasets in kaggleinput folder"""
@@ -31,90 +41,262 @@ def get_available_datasets():
     
     return available_files
 
+# Hadoop backend settings; override through the environment on other installs
+HADOOP = shutil.which('hadoop') or 'hadoop'
+HADOOP_STREAMING_JAR = os.environ.get(
+    'HADOOP_STREAMING_JAR',
+    os.path.join(os.environ.get('HADOOP_HOME', 'C:/hadoop'), 'share', 'hadoop', 'tools', 'lib', 'hadoop-streaming-2.7.7.jar'))
+CLUSTER_PYTHON = os.environ.get('PYTHON_PATH', 'python')
+# Scripts shipped to the cluster with every job
+JOB_FILES = ['mapper.py', 'combiner.py', 'stats_reducer.py', 'stats_core.py', 'quantile_sketch.py', 'performance_monitor.py',
+             'typed_bytes.py', 'job_progress.py']
+# Metrics summarized per (file, function) pair in benchmark mode
+BENCHMARK_METRICS = ['wall_seconds', 'runtime_seconds', 'throughput', 'max_memory_mb']
+# Reducers on the cluster keep their metrics there; only wall time is measured for hadoop runs
+HADOOP_BENCHMARK_METRICS = ['wall_seconds']
+
 def count_lines(filepath):
     """Count number of lines in a file"""
     with open(filepath, 'r') as f:
         return sum(1 for _ in f)
 
-def test_statistical_function(function_name, input_file):
-    """Test a statistical function with performance monitoring"""
-    print(f"\nTesting {function_name} function on {os.path.basename(input_file)}...")
+def mapper_mode(function_name):
+    """Moment-based functions pre-aggregate in the mapper, as the GUI and batch jobs do"""
+    return 'moments' if function_name in MOMENT_FUNCTIONS else 'values'
+
+def stage_hadoop_inputs(input_files):
+    """Upload every input to /kaggleinput once, before any job (or benchmark worker) reads them"""
+    subprocess.run([HADOOP, 'fs', '-mkdir', '-p', '/kaggleinput'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for input_file in input_files:
+        print(f"Staging {os.path.basename(input_file)} in /kaggleinput")
+        subprocess.run([HADOOP, 'fs', '-put', '-f', input_file, '/kaggleinput'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def run_hadoop_job(function_name, input_file, run_id, wire='text'):
+    """Run one streaming job on the cluster and return (output, errors, returncode); the input must be staged"""
+    hdfs_input = f"/kaggleinput/{os.path.basename(input_file)}"
+    
+    # A fresh output directory per run, so concurrent and repeated runs never collide
+    output_dir = f"/benchmark_output/{run_id}"
+    wire_options = ['-D', 'stream.map.output=typedbytes', '-D', 'stream.reduce.input=typedbytes'] if wire == 'typedbytes' else []
+    # Moment jobs fold each map task's output in a combiner, as the GUI and batch jobs do
+    combiner = ['-combiner', f"{CLUSTER_PYTHON} combiner.py --wire {wire}"] if function_name in MOMENT_FUNCTIONS else []
+    job = subprocess.run(
+        [HADOOP, 'jar', HADOOP_STREAMING_JAR] + wire_options +
+        ['-files', ','.join(JOB_FILES),
+         '-mapper', f"{CLUSTER_PYTHON} mapper.py {mapper_mode(function_name)} --wire {wire}"] + combiner +
+        ['-reducer', f"{CLUSTER_PYTHON} stats_reducer.py {function_name} --wire {wire}",
+         '-input', hdfs_input,
+         '-output', output_dir],
+        capture_output=True,
+        text=True
+    )
+    output, returncode = '', job.returncode
+    if returncode == 0:
+        cat = subprocess.run([HADOOP, 'fs', '-cat', f"{output_dir}/part-*"], capture_output=True, text=True)
+        output, returncode = cat.stdout, cat.returncode
+    subprocess.run([HADOOP, 'fs', '-rm', '-r', '-skipTrash', output_dir], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return output, job.stderr, returncode
+
+def test_statistical_function(function_name, input_file, backend='pipeline', result_cache=None, quiet=False,
+                              wire='text', history=None):
+    """Test a statistical function with performance monitoring; history is a job history database to record the run in"""
+    log = (lambda *args: None) if quiet else print
+    log(f"\nTesting {function_name} function on {os.path.basename(input_file)} ({backend})...")
+    
+    # Serve unchanged (input, function) pairs from the result cache when one is given
+    cache_key = None
+    if result_cache is not None:
+        cache_key = result_cache.key(input_file, function_name)
+        cached = result_cache.get(cache_key)
+        if cached:
+            log("\nStatistical Result (cached):")
+            log("\n".join(cached['results']))
+            if history:
+                record_run(new_run_id(), history, function=function_name, dataset=os.path.basename(input_file),
+                           backend=backend, source='cache', result="\n".join(cached['results']))
+            return {
+                'function': function_name,
+                'backend': backend,
+                'input_file': os.path.basename(input_file),
+                'metrics': {'runtime_seconds': 0.0, 'cached_runtime_seconds': cached['runtime_seconds']},
+                'cached': True,
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'result': "\n".join(cached['results'])
+            }
     
     # Create performance_logs directory if it doesn't exist
     if not os.path.exists('performance_logs'):
         os.makedirs('performance_logs')
     
-    # Create mapper process
-    mapper = subprocess.Popen(
-        ['python', 'mapper.py'],
-        stdin=open(input_file, 'r'),
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    # Each run writes its metrics record to its own file, so concurrent runs never collide
+    run_id = new_run_id()
+    metrics_path = run_metrics_path(run_id)
+    metrics_args = ['--run-id', run_id, '--input-name', os.path.basename(input_file), '--metrics-out', metrics_path]
     
-    # Create reducer process
-    reducer = subprocess.Popen(
-        ['python', 'stats_reducer.py', function_name],
-        stdin=mapper.stdout,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    start = time.perf_counter()
+    if backend == 'hadoop':
+        # Reducers run on the cluster, so only wall time and the results come back
+        output, errors, returncode = run_hadoop_job(function_name, input_file, run_id, wire)
+    elif backend == 'local':
+        # Built-in process-pool runner: parallel map phase, same merge logic as the reducer
+        runner = subprocess.Popen(
+            ['python', 'local_runner.py', function_name, input_file] + metrics_args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        output, errors = runner.communicate()
+        returncode = runner.returncode
+    else:
+        # Create mapper process
+        mapper = subprocess.Popen(
+            ['python', 'mapper.py', mapper_mode(function_name), '--wire', wire],
+            stdin=open(input_file, 'r'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        
+        # Create reducer process
+        reducer = subprocess.Popen(
+            ['python', 'stats_reducer.py', function_name, '--wire', wire] + metrics_args,
+            stdin=mapper.stdout,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        
+        # Close mapper's stdout to signal EOF to reducer
+        mapper.stdout.close()
+        
+        # Get output and errors; the run fails if either side does
+        output, errors = reducer.communicate()
+        returncode = mapper.wait() or reducer.returncode
+    wall_seconds = time.perf_counter() - start
     
-    # Close mapper's stdout to signal EOF to reducer
-    mapper.stdout.close()
+    # Print statistical result
+    log("\nStatistical Result:")
+    log(output.strip())
     
-    # Get output and errors
-    output, errors = reducer.communicate()
+    if errors.strip() and not os.path.exists(metrics_path):
+        log(errors.strip())
     
-    # Print statistical result
-    print("\nStatistical Result:")
-    print(output.strip())
-    
-    # Extract performance metrics
-    metrics = {}
-    in_metrics = False
-    for line in errors.split('\n'):
-        if line == "PERFORMANCE_METRICS_START":
-            in_metrics = True
-            continue
-        elif line == "PERFORMANCE_METRICS_END":
-            in_metrics = False
-            continue
-        
-        if in_metrics and line.strip():
-            print(line)  # Still print metrics to console
-            try:
-                key, value = line.split(': ')
-                # Convert string numbers to float where possible
-                try:
-                    metrics[key] = float(value)
-                except ValueError:
-                    metrics[key] = value
-            except ValueError:
-                continue
+    # Read this run's structured metrics record
+    records = read_metrics_records(metrics_path)
+    metrics = records[-1] if records else {}
+    for key in ('runtime_seconds', 'records_processed', 'throughput', 'max_cpu_usage', 'max_memory_mb'):
+        if key in metrics:
+            log(f"{key}: {metrics[key]}")
+    
+    # Only successful runs are cached; a failed one must not be served to later sweeps
+    if returncode != 0:
+        log(f"Run failed with exit code {returncode}")
+    elif cache_key and output.strip():
+        result_cache.put(cache_key, input_file, function_name, output.strip().splitlines(),
+                         metrics.get('runtime_seconds', 0.0))
     
-    # Check if performance plot was generated
-    try:
-        plot_files = [f for f in os.listdir('performance_logs') if f.startswith(f'performance_plot_{function_name}')]
-        if plot_files:
-            latest_plot = max(plot_files, key=lambda x: os.path.getctime(os.path.join('performance_logs', x)))
-            print(f"\nPerformance plot generated: {latest_plot}")
-            metrics['plot_file'] = latest_plot
-        else:
-            print("\nNo performance plot was generated for this run")
-    except Exception as e:
-        print(f"\nCould not find performance files: {str(e)}")
+    if history:
+        fields = metrics_fields(metrics) if metrics else {}
+        fields.update(function=function_name, dataset=os.path.basename(input_file), backend=backend,
+                      source=backend, wall_seconds=wall_seconds, result=output.strip() or None)
+        record_run(run_id, history, **fields)
     
     return {
         'function': function_name,
+        'backend': backend,
+        'run_id': run_id,
         'input_file': os.path.basename(input_file),
         'metrics': metrics,
+        'wall_seconds': wall_seconds,
+        'cached': False,
         'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         'result': output.strip()
     }
 
+def benchmark_startup(repeat=5):
+    """Median wall time of a bare interpreter and of a reducer run on a single record"""
+    def timed(command, stdin=''):
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = subprocess.run(command, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    text=True)
+            runs.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                raise RuntimeError(f"{' '.join(command)} failed during the startup benchmark:\n{result.stderr}")
+        return statistics.median(runs)
+
+    interpreter = timed([sys.executable, '-c', 'pass'])
+    reducer = timed([sys.executable, 'stats_reducer.py', 'stddev'], 'val\t1.0\n')
+    startup = {
+        'repeat': repeat,
+        'interpreter_seconds': interpreter,
+        'reducer_seconds': reducer,
+        'reducer_overhead_seconds': reducer - interpreter
+    }
+    print(f"\nReducer startup: {reducer:.3f}s ({reducer - interpreter:.3f}s over a bare interpreter)")
+    return startup
+
+def summarize(values):
+    """Median, nearest-rank p95 and spread of repeated measurements"""
+    return {
+        'median': statistics.median(values),
+        'p95': percentile(values, 95),
+        'min': min(values),
+        'max': max(values),
+        'stdev': statistics.pstdev(values)
+    }
+
+def benchmark_pair(function_name, input_file, backend, repeat, warmup, wire='text', history=None):
+    """Warm up, then time one (file, function) pair repeatedly and summarize the runs"""
+    for _ in range(warmup):
+        test_statistical_function(function_name, input_file, backend, quiet=True, wire=wire)
+    runs = []
+    for _ in range(repeat):
+        run = test_statistical_function(function_name, input_file, backend, quiet=True, wire=wire, history=history)
+        runs.append(dict(run['metrics'], wall_seconds=run['wall_seconds'], run_id=run['run_id']))
+    
+    summary = {}
+    for name in HADOOP_BENCHMARK_METRICS if backend == 'hadoop' else BENCHMARK_METRICS:
+        values = [r[name] for r in runs if name in r]
+        if values:
+            summary[name] = summarize(values)
+    return {
+        'function': function_name,
+        'input_file': os.path.basename(input_file),
+        'backend': backend,
+        'repeat': repeat,
+        'warmup': warmup,
+        'result': run['result'],
+        'summary': summary,
+        'runs': runs
+    }
+
+def run_benchmark(pairs, backend, repeat, warmup, jobs, wire='text', history=None):
+    """Benchmark (function, file) pairs, running up to `jobs` pairs concurrently"""
+    if jobs > 1:
+        # Repetitions of one pair stay serial; only independent pairs overlap
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(benchmark_pair, func, path, backend, repeat, warmup, wire, history)
+                       for func, path in pairs]
+            results = [future.result() for future in futures]
+    else:
+        results = [benchmark_pair(func, path, backend, repeat, warmup, wire, history) for func, path in pairs]
+    
+    if backend == 'hadoop':
+        print("\nHadoop runs: wall time only; records/s and peak memory stay with the reducers on the cluster")
+    print(f"\n{'Function':<11}{'Input file':<34}{'wall median':>12}{'p95':>9}{'stdev':>9}{'records/s':>12}{'peak MB':>9}")
+    for result in results:
+        summary = result['summary']
+        wall = summary['wall_seconds']
+        throughput = summary.get('throughput', {}).get('median')
+        memory = summary.get('max_memory_mb', {}).get('median')
+        throughput = f"{throughput:.0f}" if throughput is not None else "n/a"
+        memory = f"{memory:.1f}" if memory is not None else "n/a"
+        print(f"{result['function']:<11}{result['input_file']:<34}{wall['median']:>11.3f}s{wall['p95']:>8.3f}s"
+              f"{wall['stdev']:>8.3f}s{throughput:>12}{memory:>9}")
+    return results
+
 def save_complete_metrics(all_metrics):
     """Save all metrics to a single JSON file"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -126,8 +308,35 @@ def save_complete_metrics(all_metrics):
     print(f"\nComplete performance metrics saved to: {metrics_file}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Run every statistical function on every dataset")
+    parser.add_argument('--backend', choices=['pipeline', 'local', 'hadoop'], default='pipeline',
+                        help="mapper|reducer subprocess pipeline, the built-in local runner, or Hadoop streaming")
+    parser.add_argument('--use-cache', action='store_true',
+                        help="reuse stored results for unchanged (file, function) pairs")
+    parser.add_argument('--startup-repeat', type=int, default=5,
+                        help="runs of the reducer startup benchmark (0 to skip)")
+    parser.add_argument('--plot', action='store_true',
+                        help="render performance plots for every run once all jobs are done")
+    parser.add_argument('--wire', choices=WIRE_FORMATS, default='text',
+                        help="mapper-to-reducer record encoding for the pipeline and hadoop backends")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="benchmark mode: timed runs per (file, function) pair")
+    parser.add_argument('--warmup', type=int, default=0,
+                        help="benchmark mode: untimed runs per pair before the timed ones")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="benchmark mode: pairs run concurrently in a process pool")
+    parser.add_argument('--history', default=HISTORY_DB,
+                        help="SQLite job history every run is recorded in (see job_history.py)")
+    parser.add_argument('--no-history', action='store_true', help="do not record runs in the job history")
+    args = parser.parse_args()
+    result_cache = ResultCache() if args.use_cache else None
+    history = None if args.no_history else args.history
+    benchmark = args.repeat > 1 or args.warmup > 0 or args.jobs > 1
+    
     # Get available datasets
     datasets = get_available_datasets()
+    if args.backend == 'hadoop':
+        stage_hadoop_inputs(path for files in datasets.values() for path in files.values())
     
     # Statistical functions to test
     functions = ['median', 'stddev', 'minmax', 'percentile', 'skewness']
@@ -135,10 +344,16 @@ def main():
     # Initialize metrics collection
     all_metrics = {
         'test_timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'backend': args.backend,
+        'wire': args.wire,
         'datasets': {},
         'functions': []
     }
     
+    if args.startup_repeat > 0:
+        all_metrics['startup'] = benchmark_startup(args.startup_repeat)
+    pairs = []
+    
     # Process each dataset
     for category, files in datasets.items():
         print(f"\nProcessing {category} dataset:")
@@ -154,14 +369,30 @@ def main():
                 'record_count': record_count
             }
             
+            if benchmark:
+                pairs.extend((func, filepath) for func in functions)
+                continue
+            
             # Run each statistical function
             for func in functions:
-                metrics = test_statistical_function(func, filepath)
+                metrics = test_statistical_function(func, filepath, args.backend, result_cache, wire=args.wire,
+                                                    history=history)
                 metrics['dataset'] = category
                 metrics['data_type'] = data_type
                 all_metrics['functions'].append(metrics)
                 print("\n" + "="*50)
     
+    if benchmark:
+        # Cached results would only measure the cache, so benchmark runs always execute
+        all_metrics['benchmark'] = run_benchmark(pairs, args.backend, max(args.repeat, 1), args.warmup, args.jobs,
+                                                 args.wire, history)
+    
+    if args.plot:
+        metrics_files = [m['metrics'].get('metrics_file') for m in all_metrics['functions']]
+        metrics_files += [r.get('metrics_file') for b in all_metrics.get('benchmark', []) for r in b['runs']]
+        for plot_file in render_pending([f for f in metrics_files if f]):
+            print(f"Performance plot saved to: {plot_file}")
+    
     # Save complete metrics to a single JSON file
     save_complete_metrics(all_metrics)
 
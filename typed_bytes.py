@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Hadoop streaming typedbytes encoding for mapper/combiner/reducer records.
+
+Used instead of "key\\tvalue" text lines when the job runs with
+
+    -D stream.map.output=typedbytes -D stream.reduce.input=typedbytes
+
+and the scripts get --wire typedbytes. Every record is a typedbytes key and
+value. Raw values travel in blocks: the key "vals" and a bytes value of
+packed little-endian float64s, so neither side formats or parses a number
+per record. Partial aggregates ("moments", "sketch") keep their text
+payloads as typedbytes strings.
+"""
+import sys
+import struct
+from array import array
+
+# Typedbytes type codes (org.apache.hadoop.typedbytes.Type)
+TYPE_BYTES = 0
+TYPE_BYTE = 1
+TYPE_BOOL = 2
+TYPE_INT = 3
+TYPE_LONG = 4
+TYPE_FLOAT = 5
+TYPE_DOUBLE = 6
+TYPE_STRING = 7
+
+# Key of a packed float64 block
+VALUES_KEY = 'vals'
+
+_FIXED = {
+    TYPE_BYTE: struct.Struct('>b'),
+    TYPE_BOOL: struct.Struct('>?'),
+    TYPE_INT: struct.Struct('>i'),
+    TYPE_LONG: struct.Struct('>q'),
+    TYPE_FLOAT: struct.Struct('>f'),
+    TYPE_DOUBLE: struct.Struct('>d')
+}
+_LENGTH = struct.Struct('>i')
+
+def _encode(obj) -> bytes:
+    if isinstance(obj, str):
+        data = obj.encode('utf-8')
+        return bytes([TYPE_STRING]) + _LENGTH.pack(len(data)) + data
+    if isinstance(obj, (bytes, bytearray)):
+        return bytes([TYPE_BYTES]) + _LENGTH.pack(len(obj)) + obj
+    if isinstance(obj, float):
+        return bytes([TYPE_DOUBLE]) + _FIXED[TYPE_DOUBLE].pack(obj)
+    raise TypeError(f"Cannot encode {type(obj).__name__} as typedbytes")
+
+def write_record(stream, key, value) -> None:
+    """Write one key/value record to a binary stream"""
+    stream.write(_encode(key) + _encode(value))
+
+def pack_values(values: array) -> bytes:
+    """Little-endian float64 block for an array('d')"""
+    if sys.byteorder == 'big':
+        values = array('d', values)
+        values.byteswap()
+    return values.tobytes()
+
+def unpack_values(data: bytes) -> array:
+    """array('d') from a little-endian float64 block"""
+    values = array('d')
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def write_values(stream, values: array) -> None:
+    """Write a block of raw values as one record"""
+    if len(values):
+        write_record(stream, VALUES_KEY, pack_values(values))
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated typedbytes record")
+    return data
+
+def _read_object(stream):
+    code = stream.read(1)
+    if not code:
+        return None
+    code = code[0]
+    if code in (TYPE_BYTES, TYPE_STRING):
+        data = _read_exact(stream, _LENGTH.unpack(_read_exact(stream, 4))[0])
+        return data if code == TYPE_BYTES else data.decode('utf-8')
+    if code in _FIXED:
+        fixed = _FIXED[code]
+        return fixed.unpack(_read_exact(stream, fixed.size))[0]
+    raise ValueError(f"Unsupported typedbytes type code {code}")
+
+def read_records(stream):
+    """Yield (key, value) pairs from a binary typedbytes stream until EOF"""
+    while True:
+        key = _read_object(stream)
+        if key is None:
+            return
+        value = _read_object(stream)
+        if value is None:
+            raise ValueError("Truncated typedbytes record")
+        yield key, value